@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# the modules in utils import each other script-style (from preprocessing import ...)
+sys.path.insert(0, os.path.join(ROOT, 'utils'))
+
+
+def _data_path(folder):
+    def path(name):
+        file_path = os.path.join(ROOT, 'data', folder, name)
+        if not os.path.exists(file_path):
+            pytest.skip(f'{file_path} not available')
+        return file_path
+    return path
+
+
+@pytest.fixture
+def raw_path():
+    return _data_path('raw')
+
+
+@pytest.fixture
+def processed_path():
+    return _data_path('processed')
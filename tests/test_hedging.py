@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from hedging import (delta_hedge, delta_hedge_old, hedge_pairs, run_delta_hedge_analysis,
+                     run_delta_hedge_batch, run_delta_vega_hedge_analysis)
+from preprocessing import load_data
+
+FREQUENCIES = [1, 2, 5, 10]
+STATS = ['mse', 'mean_error', 'std_error']
+
+
+@pytest.fixture(params=['IBM_processed.csv', 'TSLA_processed.csv', 'AAPL_processed.csv'])
+def processed(request, processed_path):
+    return load_data(processed_path(request.param))
+
+
+def assert_same_results(actual, expected):
+    assert len(actual) == len(expected)
+    key_columns = ['expiration_date', 'K', 'initial_moneyness', 'hedge_frequency']
+    pd.testing.assert_frame_equal(actual[key_columns].reset_index(drop=True),
+                                  expected[key_columns].reset_index(drop=True))
+    for col in STATS:
+        np.testing.assert_allclose(actual[col].to_numpy(float), expected[col].to_numpy(float),
+                                   rtol=1e-12, atol=1e-12)
+    for got, want in zip(actual['errors'], expected['errors']):
+        pd.testing.assert_frame_equal(got.reset_index(drop=True), want.reset_index(drop=True),
+                                      check_exact=False, rtol=1e-12, atol=1e-12)
+
+
+def test_delta_hedge_matches_old(processed):
+    for option_id, opt_data in processed.groupby('option_id'):
+        for freq in FREQUENCIES:
+            new = delta_hedge(opt_data, freq)
+            old = delta_hedge_old(opt_data, freq)
+
+            for key in ['expiration_date', 'K', 'initial_moneyness', 'hedge_frequency']:
+                assert new[key] == old[key], (option_id, freq, key)
+            # single-row options: the old loop builds its empty frame with object columns
+            pd.testing.assert_frame_equal(new['errors'], old['errors'], check_exact=False,
+                                          check_dtype=len(opt_data) > 1, rtol=1e-12, atol=1e-12,
+                                          obj=f'{option_id} freq={freq}')
+            np.testing.assert_allclose([new[col] for col in STATS], [old[col] for col in STATS],
+                                       rtol=1e-12, atol=1e-12, err_msg=f'{option_id} freq={freq}')
+
+
+def test_batch_matches_analysis(processed):
+    expected = run_delta_hedge_analysis(processed, FREQUENCIES)
+    assert_same_results(run_delta_hedge_batch(processed, FREQUENCIES), expected)
+
+    summary_only = run_delta_hedge_batch(processed, FREQUENCIES, return_errors=False)
+    assert 'errors' not in summary_only.columns
+    pd.testing.assert_frame_equal(summary_only[STATS], expected[STATS],
+                                  check_exact=False, rtol=1e-12, atol=1e-12)
+
+
+def test_delta_hedge_analysis_parallel_matches_serial(processed):
+    serial = run_delta_hedge_analysis(processed, FREQUENCIES)
+    assert_same_results(run_delta_hedge_analysis(processed, FREQUENCIES, n_jobs=2), serial)
+
+
+def test_delta_vega_hedge_analysis_parallel_matches_serial(processed_path):
+    data = load_data(processed_path('AAPL_processed_vega.csv'))
+    pairs = hedge_pairs(data)
+
+    serial = run_delta_vega_hedge_analysis(data, pairs, FREQUENCIES)
+    parallel = run_delta_vega_hedge_analysis(data, pairs, FREQUENCIES, n_jobs=2)
+
+    assert len(serial) > 0
+    pd.testing.assert_frame_equal(parallel.drop(columns='errors'), serial.drop(columns='errors'))
+    for got, want in zip(parallel['errors'], serial['errors']):
+        pd.testing.assert_frame_equal(got, want)
+
+
+def test_batch_on_empty_panel(processed):
+    empty = processed.iloc[:0]
+    expected = run_delta_hedge_analysis(empty, FREQUENCIES)
+    assert expected.empty
+    pd.testing.assert_frame_equal(run_delta_hedge_batch(empty, FREQUENCIES), expected)
+    assert run_delta_hedge_batch(empty, FREQUENCIES, return_errors=False).empty
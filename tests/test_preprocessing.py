@@ -0,0 +1,80 @@
+import pandas as pd
+import pytest
+
+from preprocessing import (Pipeline, load_data, process_delta_vega, process_delta_vega_incremental,
+                           save_data)
+from rates import RateCurve
+
+
+@pytest.fixture
+def ibm(raw_path):
+    raw = load_data(raw_path('IBM.csv'))
+    rates = RateCurve.from_csv(raw_path('interest_rate.csv'), tolerance=pd.Timedelta(days=7))
+    return raw, rates
+
+
+def _sorted(data, columns):
+    return data.sort_values(['option_id', 'date']).reset_index(drop=True)[columns]
+
+
+@pytest.mark.parametrize('cut', ['2018-11-02', '2020-03-02', '2022-11-18'])
+@pytest.mark.parametrize('suffix', ['.csv', '.parquet'])
+def test_incremental_matches_full_run(ibm, tmp_path, cut, suffix):
+    if suffix == '.parquet':
+        pytest.importorskip('pyarrow')
+    raw, rates = ibm
+    calendar = pd.Index(sorted(raw['date'].unique()))
+    cut = pd.Timestamp(cut)
+    old, new = raw[raw['date'] < cut], raw[raw['date'] >= cut]
+
+    # the daily workflow: the existing panel is saved and read back before appending
+    panel_path = str(tmp_path / f'panel{suffix}')
+    save_data(process_delta_vega(old.copy(), rates, all_trading_days=calendar[calendar < cut]), panel_path)
+    updated = process_delta_vega_incremental(load_data(panel_path), new, rates, calendar)
+
+    full = process_delta_vega(raw.copy(), rates)
+    columns = list(full.columns)
+    pd.testing.assert_frame_equal(_sorted(updated, columns), _sorted(full, columns),
+                                  check_dtype=False, check_categorical=False)
+
+
+def test_pipeline_projects_raw_columns(ibm):
+    raw, rates = ibm
+    # IBM.csv carries an index column and its own initial_moneyness
+    assert {'Unnamed: 0', 'initial_moneyness'} <= set(raw.columns)
+    columns = list(raw.columns)
+
+    processed = process_delta_vega(raw, rates)
+
+    assert list(processed.columns) == ['date', 'C', 'K', 'expiration_date', 'option_id', 'S', 'TTM',
+                                       'r', 'IV', 'delta', 'vega', 'initial_moneyness', 'delta_start']
+    assert list(raw.columns) == columns
+    assert sorted(Pipeline(lifetime=45, outputs=('IV', 'delta')).input_columns) == [
+        'C', 'K', 'S', 'date', 'expiration_date', 'option_id']
+
+
+def test_incremental_rejects_days_outside_calendar(ibm):
+    raw, rates = ibm
+    calendar = pd.Index(sorted(raw['date'].unique()))
+    cut = calendar[len(calendar) // 2]
+    processed = process_delta_vega(raw[raw['date'] < cut].copy(), rates)
+
+    with pytest.raises(ValueError):
+        process_delta_vega_incremental(processed, raw[raw['date'] >= cut], rates, calendar[calendar < cut])
+
+
+@pytest.mark.parametrize('suffix', ['.parquet', '.feather'])
+def test_columnar_round_trip_keeps_strikes(tmp_path, suffix):
+    pytest.importorskip('pyarrow')
+    panel = pd.DataFrame({'date': ['2023-06-01', '2023-06-02'],
+                          'expiration_date': ['2023-06-29', '2023-06-29'],
+                          'option_id': ['0700_2023-06-29_K300.3', 'BAYGn_2023-06-29_K52.55'],
+                          'K': [300.3, 52.55], 'C': [1.25, 0.5]})
+    path = str(tmp_path / f'panel{suffix}')
+    save_data(panel, path)
+    loaded = load_data(path)
+
+    assert loaded['K'].dtype == 'float64'
+    assert loaded['K'].tolist() == [300.3, 52.55]
+    assert isinstance(loaded['option_id'].dtype, pd.CategoricalDtype)
+    assert loaded['expiration_date'].dtype.kind == 'M'
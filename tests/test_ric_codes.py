@@ -0,0 +1,107 @@
+import itertools
+
+import numpy as np
+import pytest
+
+import option_ric_tools_new as tools
+import ric_codes
+
+# (exchange, asset, maturity, strike, opt_type) -> first candidate RIC
+RIC_TABLE = [
+    ('OPQ', 'IBM.N', '2017-01-20', 152.5, 'C', 'IBMA201715250.U'),
+    ('OPQ', 'IBM.N', '2017-01-20', 152.50, 'C', 'IBMA201715250.U'),
+    ('OPQ', 'IBM.N', '2017-01-20', np.float64(152.5), 'C', 'IBMA201715250.U'),
+    ('OPQ', 'IBM.N', '2017-01-20', 152.3, 'P', 'IBMM201715230.U'),
+    ('OPQ', 'IBM.N', '2019-12-20', 9999, 'C', 'IBMl201999990.U'),
+    ('OPQ', 'IBM.N', '2023-06-16', 1250, 'P', 'IBMr162312500.U'),
+    ('OPQ', '.SPX', '2024-07-05', 27125.0, 'c', 'SPXg524B7125.U'),
+    ('HKG', '0700.HK', '2023-06-29', 300.3, 'C', '0700300300F3.HK'),
+    ('HFE', '.HSI', '2023-06-29', 18000, 'P', 'HSI18000R3.HF'),
+    ('OSA', '7203.T', '2024-07-05', 2500, 'C', '7203Y250G4.OS'),
+    ('OSA', '7203.T', '2024-07-05', 55, 'P', '7203Y55S4.OS'),
+    ('OSA', '7203.T', '2024-07-05', 55.0, 'P', '7203Y55S4.OS'),
+    ('OSA', '.N225', '2024-07-05', 33000, 'C', 'JNI330G4.OS'),
+    ('EUX', 'BAYGn.DE', '2024-07-05', 52.5, 'C', 'BAYGn525G4.EX'),
+    ('EUX', '.GDAXI', '2024-07-05', 18000, 'P', 'GDAX180000S4.EX'),
+    ('EUX', '.FOO', '2024-07-05', 100, 'P', 'FOO1000S4.EX'),
+    ('IEU', 'VOD.L', '2024-07-05', 7.5, 'C', 'VOD075G4.L'),
+    ('IEU', 'VOD.L', '2024-07-05', 7, 'C', 'VOD070G4.L'),
+    ('IEU', 'VOD.L', '2024-07-05', 7.0, 'C', 'VOD070G4.L'),
+    ('IEU', 'VOD.L', '2024-07-05', 120, 'P', 'VOD120S4.L'),
+    ('IEU', '.FTSE', '2024-07-05', 7500, 'C', 'LFE7500G4.L'),
+]
+
+# cases where the legacy builders were wrong and the tables intentionally differ
+INTENDED_DIFFERENCES = [
+    # str(np.float64(152.5)) has no trailing zero, the old decimal part came out as 00
+    ('OPQ', 'IBM.N', '2017-01-20', np.float64(152.5), 'C', 'IBMA201715200.U'),
+    # str(55.0)[:3] kept the decimal point
+    ('OSA', '7203.T', '2024-07-05', 55.0, 'P', '7203Y55.S4.OS'),
+    # integer single-digit strikes lost the first decimal
+    ('IEU', 'VOD.L', '2024-07-05', 7, 'C', 'VOD7G4.L'),
+]
+
+
+def _old_builder(exchange):
+    return getattr(tools, ric_codes.EXCHANGE_RICS[exchange].__name__ + '_old')
+
+
+@pytest.mark.parametrize('exchange, asset, maturity, strike, opt_type, expected', RIC_TABLE)
+def test_first_candidate(exchange, asset, maturity, strike, opt_type, expected):
+    candidates = ric_codes.candidate_rics(exchange, asset, maturity, strike, opt_type)
+    assert candidates.shape[0] == 1
+    assert candidates[0, 0] == expected
+
+
+@pytest.mark.parametrize('exchange, asset, maturity, strike, opt_type, old', INTENDED_DIFFERENCES)
+def test_intended_differences(exchange, asset, maturity, strike, opt_type, old):
+    assert _old_builder(exchange)(asset, maturity, strike, opt_type)[0][0] == old
+    expected = next(row[-1] for row in RIC_TABLE if row[:4] == (exchange, asset, maturity, strike))
+    assert ric_codes.candidate_rics(exchange, asset, maturity, strike, opt_type)[0, 0] == expected
+
+
+def test_generations():
+    assert list(ric_codes.candidate_rics('HKG', '0700.HK', '2023-06-29', 300.3, 'C')[0]) == [
+        '0700300300F3.HK', '0700300301F3.HK', '0700300302F3.HK', '0700300303F3.HK']
+    assert list(ric_codes.candidate_rics('OSA', '.N225', '2024-07-05', 33000, 'C')[0]) == [
+        'JNI330G4.OS', 'JNIL330G4.OS', 'JNIR330G4.OS']
+    assert list(ric_codes.candidate_rics('EUX', 'BAYGn.DE', '2024-07-05', 52.5, 'C')[0]) == [
+        'BAYGn525G4.EX', 'BAYGn525aG4.EX', 'BAYGn525bG4.EX', 'BAYGn525cG4.EX', 'BAYGn525dG4.EX']
+    assert ric_codes.candidate_rics('OSA', '7203.T', '2024-07-05', 2500, 'C').shape == (1, 15)
+
+
+def test_grid_matches_rows():
+    maturities = np.repeat(['2017-01-20', '2023-06-16'], 3)
+    strikes = np.tile([150, 152.5, 1250], 2)
+    grid = ric_codes.candidate_rics('OPQ', 'IBM.N', maturities, strikes, 'P')
+    assert grid.shape == (6, 1)
+    for i in range(6):
+        assert grid[i, 0] == ric_codes.rics_opra('IBM.N', maturities[i], strikes[i], 'P')[0, 0]
+
+
+def test_invalid_opt_type():
+    with pytest.raises(ValueError):
+        ric_codes.candidate_rics('OPQ', 'IBM.N', '2017-01-20', 150, 'X')
+
+
+ASSETS = {'OPQ': ['IBM.N', '.SPX'],
+          'HKG': ['0700.HK', '.HSI'],
+          'OSA': ['7203.T', '.N225', '.TOPX'],
+          'EUX': ['BAYGn.DE', '.FTSE', '.SSMI', '.GDAXI', '.ATX', '.STOXX50E'],
+          'IEU': ['VOD.L', '.FTSE']}
+MATURITIES = ['2017-01-20', '2019-12-20', '2024-07-05', '2030-03-15']
+STRIKES = [0.5, 5.0, 5.5, 9.25, 12.0, 15.5, 99.75, 152.5, 152.25, 152.05, 999.5, 1000.0,
+           1250.5, 9999.0, 12000.0, 25000.0, 27125.0, 49999.0, 5, 12, 152, 1000, 27000]
+
+
+@pytest.mark.parametrize('exchange', sorted(ASSETS))
+def test_matches_old_builders(exchange):
+    old_builder, new_builder = _old_builder(exchange), getattr(tools, ric_codes.EXCHANGE_RICS[exchange].__name__)
+    for asset, maturity, strike, opt_type in itertools.product(ASSETS[exchange], MATURITIES, STRIKES, ['C', 'P', 'c']):
+        # skip the strike ranges of INTENDED_DIFFERENCES
+        if exchange == 'OSA' and strike < 100:
+            continue
+        if exchange == 'IEU' and isinstance(strike, int) and strike < 10:
+            continue
+        assert new_builder(asset, maturity, strike, opt_type)[0] == old_builder(asset, maturity, strike, opt_type)[0], \
+            (asset, maturity, strike, opt_type)
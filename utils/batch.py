@@ -0,0 +1,145 @@
+import argparse
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from hedging import worker_count
+from preprocessing import (PROCESSED_DIR, RATE_FILE, RAW_COLUMNS, RAW_DIR, load_data, process,
+                           process_delta_vega, save_data)
+from rates import RateCurve
+
+
+def find_tickers(pattern: str = os.path.join(RAW_DIR, '*.csv')) -> List[str]:
+    """
+    Tickers of the long-format raw chains (<ticker>.csv) matching pattern.
+    The rate file and the per-expiration download files are skipped by
+    looking at their header.
+    """
+    tickers = []
+    for path in sorted(glob.glob(pattern)):
+        header = pd.read_csv(path, nrows=0).columns
+        if set(RAW_COLUMNS).issubset(header):
+            tickers.append(os.path.splitext(os.path.basename(path))[0])
+    return tickers
+
+
+def _process_ticker(ticker: str, rates: RateCurve, raw_dir: str, out_dir: str,
+                    delta_vega: bool, fmt: str) -> Dict[str, Any]:
+    raw_path = os.path.join(raw_dir, f'{ticker}.csv')
+    suffix = '_processed_vega' if delta_vega else '_processed'
+    out_path = os.path.join(out_dir, f'{ticker}{suffix}.{fmt}')
+
+    entry = {'ticker': ticker, 'input': raw_path, 'output': out_path, 'timings': {}}
+    try:
+        start = time.perf_counter()
+        data = load_data(raw_path)
+        entry['timings']['load'] = time.perf_counter() - start
+        entry['rows_in'] = len(data)
+        entry['options_in'] = int(data['option_id'].nunique())
+
+        start = time.perf_counter()
+        run = process_delta_vega if delta_vega else process
+        processed, report = run(data, rates, return_report=True)
+        entry['timings']['process'] = time.perf_counter() - start
+        entry['stages'] = report.stages
+
+        start = time.perf_counter()
+        save_data(processed, out_path)
+        entry['timings']['save'] = time.perf_counter() - start
+
+        entry['rows_out'] = len(processed)
+        entry['options_kept'] = int(processed['option_id'].nunique())
+        entry['options_dropped'] = entry['options_in'] - entry['options_kept']
+    except Exception as e:
+        # one malformed file must not take the other tickers down with it
+        entry['error'] = f'{type(e).__name__}: {e}'
+    return entry
+
+
+def process_tickers(tickers: Optional[List[str]] = None,
+                    pattern: Optional[str] = None,
+                    raw_dir: str = RAW_DIR,
+                    out_dir: str = PROCESSED_DIR,
+                    delta_vega: bool = True,
+                    fmt: str = 'csv',
+                    rate_tolerance_days: int = 7,
+                    n_jobs: int = 1) -> Dict[str, Any]:
+    """
+    Preprocesses several tickers in one run.
+
+    tickers: explicit list, otherwise every <ticker>.csv matching pattern
+    (default: all raw files). The rate curve is loaded once and shared; with
+    n_jobs > 1 (or -1 for all cores) tickers run in a process pool. Writes
+    one output per ticker plus manifest.json in out_dir and returns the
+    manifest.
+    """
+    if tickers is None:
+        tickers = find_tickers(pattern or os.path.join(raw_dir, '*.csv'))
+
+    run_start = time.perf_counter()
+    rate_path = os.path.join(raw_dir, RATE_FILE)
+    rates = RateCurve.from_csv(rate_path, tolerance=pd.Timedelta(days=rate_tolerance_days))
+    rate_time = time.perf_counter() - run_start
+
+    os.makedirs(out_dir, exist_ok=True)
+    n_workers = worker_count(n_jobs)
+    args = (repeat(rates), repeat(raw_dir), repeat(out_dir), repeat(delta_vega), repeat(fmt))
+
+    if n_workers == 1:
+        entries = list(map(_process_ticker, tickers, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            entries = list(executor.map(_process_ticker, tickers, *args))
+
+    manifest = {
+        'created': pd.Timestamp.now().isoformat(),
+        'stage': 'process_delta_vega' if delta_vega else 'process',
+        'rate_file': rate_path,
+        'rate_tolerance_days': rate_tolerance_days,
+        'n_jobs': n_workers,
+        'timings': {'load_rates': rate_time, 'total': time.perf_counter() - run_start},
+        'tickers': entries
+    }
+    with open(os.path.join(out_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Preprocess several option chains in one run.')
+    parser.add_argument('tickers', nargs='*', help='tickers to process (default: all raw files)')
+    parser.add_argument('--pattern', help='glob over raw files, e.g. "data/raw/T*.csv"')
+    parser.add_argument('--raw-dir', default=RAW_DIR)
+    parser.add_argument('--out-dir', default=PROCESSED_DIR)
+    parser.add_argument('--delta-only', action='store_true',
+                        help='run process (45 days, no vega) instead of process_delta_vega')
+    parser.add_argument('--format', default='csv', choices=['csv', 'parquet', 'feather'])
+    parser.add_argument('--rate-tolerance-days', type=int, default=7)
+    parser.add_argument('-j', '--n-jobs', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    manifest = process_tickers(tickers=args.tickers or None,
+                               pattern=args.pattern,
+                               raw_dir=args.raw_dir,
+                               out_dir=args.out_dir,
+                               delta_vega=not args.delta_only,
+                               fmt=args.format,
+                               rate_tolerance_days=args.rate_tolerance_days,
+                               n_jobs=args.n_jobs)
+
+    for entry in manifest['tickers']:
+        if 'error' in entry:
+            print(f"{entry['ticker']}: failed ({entry['error']})")
+        else:
+            print(f"{entry['ticker']}: {entry['options_kept']}/{entry['options_in']} options, "
+                  f"{entry['rows_out']} rows -> {entry['output']}")
+
+
+if __name__ == "__main__":
+    main()
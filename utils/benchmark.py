@@ -0,0 +1,289 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from hedging import (delta_hedge, hedge_pairs, run_delta_hedge_analysis, run_delta_hedge_batch,
+                     run_delta_vega_hedge_analysis)
+from preprocessing import (PROCESSED_DIR, RATE_FILE, RAW_COLUMNS, RAW_DIR, load_data, process,
+                           process_delta_vega)
+from rates import RateCurve
+from tools import bs_greeks, bs_price, get_delta, get_vega, implied_vol, implied_vol_vec
+
+BENCHMARK_DIR = 'data/benchmarks'
+
+SHIPPED_RAW = ['IBM', 'TSLA']
+SHIPPED_PROCESSED = ['AAPL']
+FREQUENCIES = [1, 2, 3, 7]
+
+# the scalar brentq solver is too slow for whole chains, it is timed on a sample
+IV_SAMPLE = 2000
+
+
+def synthetic_chain(scale: float = 1, n_expirations: int = 70, seed: int = 0,
+                    start: str = '2016-01-04', r: float = 0.01):
+    """
+    Raw chain in the long format of data/raw (date, C, K, expiration_date,
+    option_id, S) plus a matching rate frame.
+
+    At scale 1 the chain has the size of the shipped IBM data (70 monthly
+    expirations, 3 strikes each); scale multiplies the strikes per
+    expiration. Every option trades on all business days of the 90 days
+    before its expiration, so it passes validation; prices come from
+    Black-Scholes on a GBM path with a volatility smile.
+    """
+    rng = np.random.default_rng(seed)
+    n_strikes = max(int(round(3 * scale)), 1)
+
+    days = pd.bdate_range(start, periods=70 + 21 * n_expirations)
+    S_path = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, len(days))))
+    # strikes sit on one lattice so consecutive expirations share strikes (hedge pairs)
+    step = 60 / n_strikes
+
+    frames = []
+    for exp_pos in range(70, len(days), 21)[:n_expirations]:
+        expiration = days[exp_pos]
+        first = days.searchsorted(expiration - pd.Timedelta(days=90))
+        window = np.arange(first, exp_pos + 1)
+
+        # strikes from 30% below the spot at listing upwards
+        K = np.round((np.round(0.7 * S_path[first] / step) + np.arange(n_strikes)) * step, 4)
+        K = np.unique(K[K > 0])
+        S = S_path[window]
+        ttm = (expiration - days[window]).days.to_numpy() / 365.0
+
+        S_grid, K_grid = np.meshgrid(S, K)
+        ttm_grid = np.broadcast_to(ttm, S_grid.shape)
+        sigma = 0.25 + 0.3 * np.log(K_grid / S_grid) ** 2 + rng.normal(0, 0.005, S_grid.shape)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            C = bs_price(S_grid, K_grid, r, sigma, ttm_grid)
+        # at expiration the option is worth its intrinsic value
+        C = np.where(ttm_grid > 0, C, np.maximum(S_grid - K_grid, 0))
+
+        frames.append(pd.DataFrame({
+            'date': np.tile(days[window], len(K)),
+            'C': np.round(C, 2).ravel(),
+            'K': np.repeat(K, len(window)),
+            'expiration_date': expiration,
+            'option_id': np.repeat([f'SYN_{expiration:%Y-%m-%d}_K{k:g}' for k in K], len(window)),
+            'S': S_grid.ravel(),
+        }))
+
+    rates = pd.DataFrame({'date': days, 'r': r})
+    return pd.concat(frames, ignore_index=True), rates
+
+
+def _delta_hedge_all(data: pd.DataFrame, hedge_frequency: int = 1):
+    return [delta_hedge(group, hedge_frequency)
+            for _, group in data.groupby('option_id', observed=True)]
+
+
+def _implied_vol_rows(C, S, K, r, ttm):
+    return [implied_vol(*row) for row in zip(C, S, K, r, ttm)]
+
+
+def measure(func: Callable, make_args: Callable[[], tuple], repeat: int = 3) -> Dict[str, float]:
+    """
+    Best wall time over repeat runs, plus the peak traced memory of one
+    extra run. make_args builds fresh arguments for every run (outside the
+    timing), since some of the functions modify their input.
+    """
+    times = []
+    for _ in range(repeat):
+        args = make_args()
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+
+    args = make_args()
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {'seconds': min(times), 'mean_seconds': float(np.mean(times)),
+            'peak_mb': peak / 1024 ** 2}
+
+
+def _cases(raw: Optional[pd.DataFrame], rates, processed: pd.DataFrame,
+           frequencies: List[int], n_jobs: int) -> List[Dict[str, Any]]:
+    """
+    (name, func, make_args, rows, options) of every benchmark that applies to
+    the dataset. Throughput is counted on the rows the function receives.
+    """
+    sample = processed.iloc[:IV_SAMPLE]
+    arrays = [processed[col].to_numpy() for col in ['S', 'K', 'r', 'IV', 'TTM']]
+    pairs = hedge_pairs(processed)
+    n_options = processed['option_id'].nunique()
+
+    cases = []
+    if raw is not None:
+        n_raw_options = raw['option_id'].nunique()
+        cases += [
+            ('process', process, lambda: (raw.copy(), rates), len(raw), n_raw_options),
+            ('process_delta_vega', process_delta_vega, lambda: (raw.copy(), rates),
+             len(raw), n_raw_options),
+        ]
+    cases += [
+        ('implied_vol', _implied_vol_rows,
+         lambda: tuple(sample[col].to_numpy() for col in ['C', 'S', 'K', 'r', 'TTM']),
+         len(sample), sample['option_id'].nunique()),
+        ('implied_vol_vec', implied_vol_vec,
+         lambda: tuple(processed[col].to_numpy() for col in ['C', 'S', 'K', 'r', 'TTM']),
+         len(processed), n_options),
+        ('get_delta', get_delta, lambda: (arrays[0], arrays[1], arrays[2], arrays[3], arrays[4]),
+         len(processed), n_options),
+        ('get_vega', get_vega, lambda: (arrays[0], arrays[1], arrays[2], arrays[3], arrays[4]),
+         len(processed), n_options),
+        ('bs_greeks', bs_greeks, lambda: (*arrays, ('delta', 'vega')), len(processed), n_options),
+        ('delta_hedge', _delta_hedge_all, lambda: (processed,), len(processed), n_options),
+        ('run_delta_hedge_analysis', run_delta_hedge_analysis,
+         lambda: (processed, frequencies, n_jobs), len(processed), n_options),
+        ('run_delta_hedge_batch', run_delta_hedge_batch,
+         lambda: (processed, frequencies), len(processed), n_options),
+        ('run_delta_vega_hedge_analysis', run_delta_vega_hedge_analysis,
+         lambda: (processed, pairs, frequencies, n_jobs), len(processed), pairs['option_id'].nunique()),
+    ]
+    return [dict(zip(['name', 'func', 'make_args', 'rows', 'options'], case)) for case in cases]
+
+
+def run_dataset(dataset: str, raw: Optional[pd.DataFrame], rates, processed: Optional[pd.DataFrame] = None,
+                benchmarks: Optional[List[str]] = None, frequencies: List[int] = FREQUENCIES,
+                repeat: int = 3, n_jobs: int = 1) -> List[Dict[str, Any]]:
+    with contextlib.redirect_stdout(io.StringIO()):
+        if processed is None:
+            processed = process_delta_vega(raw.copy(), rates)
+
+    results = []
+    for case in _cases(raw, rates, processed, frequencies, n_jobs):
+        if benchmarks and case['name'] not in benchmarks:
+            continue
+        # the functions print progress per option, keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            timing = measure(case['func'], case['make_args'], repeat)
+        seconds = max(timing['seconds'], 1e-12)
+        result = {'dataset': dataset, 'benchmark': case['name'],
+                  'rows': int(case['rows']), 'options': int(case['options']),
+                  **timing,
+                  'rows_per_s': case['rows'] / seconds,
+                  'options_per_s': case['options'] / seconds}
+        print(f"{dataset:>14} {case['name']:<30} {timing['seconds']:9.4f} s "
+              f"{result['rows_per_s']:14,.0f} rows/s {timing['peak_mb']:9.1f} MB")
+        results.append(result)
+    return results
+
+
+def _environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'created': pd.Timestamp.now().isoformat(), 'commit': commit,
+            'python': platform.python_version(), 'numpy': np.__version__,
+            'pandas': pd.__version__, 'machine': platform.machine(),
+            'cpu_count': os.cpu_count()}
+
+
+def run_benchmarks(tickers: Optional[List[str]] = None,
+                   scales: List[float] = (10,),
+                   benchmarks: Optional[List[str]] = None,
+                   repeat: int = 3,
+                   n_jobs: int = 1,
+                   raw_dir: str = RAW_DIR,
+                   processed_dir: str = PROCESSED_DIR,
+                   out_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Benchmarks the shipped chains (IBM and TSLA from raw, AAPL from its
+    processed file, so only the post-processing benchmarks) and synthetic
+    chains at the given scales, and writes the report as JSON.
+    """
+    tickers = SHIPPED_RAW + SHIPPED_PROCESSED if tickers is None else tickers
+    rates = RateCurve.from_csv(os.path.join(raw_dir, RATE_FILE), tolerance=pd.Timedelta(days=7))
+
+    results = []
+    for ticker in tickers:
+        if ticker in SHIPPED_PROCESSED:
+            processed = load_data(os.path.join(processed_dir, f'{ticker}_processed_vega.csv'))
+            processed = processed.drop(columns=['Unnamed: 0'], errors='ignore')
+            results += run_dataset(ticker, None, rates, processed, benchmarks, repeat=repeat, n_jobs=n_jobs)
+        else:
+            raw = load_data(os.path.join(raw_dir, f'{ticker}.csv'), columns=RAW_COLUMNS)
+            results += run_dataset(ticker, raw, rates, None, benchmarks, repeat=repeat, n_jobs=n_jobs)
+
+    for scale in scales:
+        raw, synthetic_rates = synthetic_chain(scale)
+        results += run_dataset(f'synthetic_x{scale:g}', raw, RateCurve(synthetic_rates), None,
+                               benchmarks, repeat=repeat, n_jobs=n_jobs)
+
+    report = {'environment': _environment(), 'repeat': repeat, 'n_jobs': n_jobs,
+              'results': results}
+
+    if out_path is None:
+        commit = report['environment']['commit']
+        out_path = os.path.join(BENCHMARK_DIR, f"benchmark_{(commit or 'nocommit')[:10]}.json")
+    os.makedirs(os.path.dirname(out_path) or '.', exist_ok=True)
+    with open(out_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print('Results written to', out_path)
+    return report
+
+
+def compare(old_path: str, new_path: str, threshold: float = 1.1) -> pd.DataFrame:
+    """
+    Side by side timings of two reports; 'slowdown' is new / old seconds and
+    rows above threshold are flagged as regressions.
+    """
+    frames = []
+    for path in [old_path, new_path]:
+        with open(path) as f:
+            frames.append(pd.DataFrame(json.load(f)['results']).set_index(['dataset', 'benchmark']))
+    old, new = frames
+
+    table = pd.DataFrame({'old_s': old['seconds'], 'new_s': new['seconds'],
+                          'old_peak_mb': old['peak_mb'], 'new_peak_mb': new['peak_mb']}).dropna()
+    table['slowdown'] = table['new_s'] / table['old_s']
+    table['regression'] = table['slowdown'] > threshold
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the preprocessing and hedging hot paths.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run = subparsers.add_parser('run', help='run the benchmarks and save a JSON report')
+    run.add_argument('--tickers', nargs='*', help='shipped chains (default: IBM TSLA AAPL)')
+    run.add_argument('--scales', nargs='*', type=float, default=[10],
+                     help='synthetic chain sizes relative to IBM, e.g. 10 100 1000')
+    run.add_argument('--benchmarks', nargs='*', help='subset of benchmarks by name')
+    run.add_argument('--repeat', type=int, default=3)
+    run.add_argument('-j', '--n-jobs', type=int, default=1)
+    run.add_argument('--out', help=f'output JSON (default: {BENCHMARK_DIR}/benchmark_<commit>.json)')
+
+    cmp = subparsers.add_parser('compare', help='compare two saved reports')
+    cmp.add_argument('old')
+    cmp.add_argument('new')
+    cmp.add_argument('--threshold', type=float, default=1.1)
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        run_benchmarks(tickers=args.tickers, scales=args.scales, benchmarks=args.benchmarks,
+                       repeat=args.repeat, n_jobs=args.n_jobs, out_path=args.out)
+    else:
+        table = compare(args.old, args.new, args.threshold)
+        print(table.to_string(float_format='{:.4f}'.format))
+        if table['regression'].any():
+            print('Regressions:', ', '.join('/'.join(idx) for idx in table.index[table['regression']]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+CACHE_DIR = 'data/cache'
+MAX_CACHE_BYTES = 2 * 1024 ** 3
+
+
+def file_digest(file_path: str, chunk_size: int = 1 << 20) -> str:
+    sha = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def cache_key(input_paths: List[str], settings: Dict[str, Any]) -> str:
+    """
+    Content address of a cached output: hashes of the input files plus the
+    settings the output depends on (stage, lifetime window, solver settings).
+    """
+    payload = {
+        'inputs': [file_digest(path) for path in input_paths],
+        'settings': settings
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _entry_paths(key: str, cache_dir: str):
+    return (os.path.join(cache_dir, f'{key}.pkl'),
+            os.path.join(cache_dir, f'{key}.json'))
+
+
+def load_cached(key: str, cache_dir: str = CACHE_DIR) -> Optional[pd.DataFrame]:
+    data_path, _ = _entry_paths(key, cache_dir)
+    if not os.path.exists(data_path):
+        return None
+    # touch on hit so eviction drops the least recently used entries first
+    os.utime(data_path)
+    return pd.read_pickle(data_path)
+
+
+def store(key: str, data: pd.DataFrame, info: Dict[str, Any],
+          cache_dir: str = CACHE_DIR, max_bytes: int = MAX_CACHE_BYTES) -> None:
+    os.makedirs(cache_dir, exist_ok=True)
+    data_path, info_path = _entry_paths(key, cache_dir)
+
+    # write to a temporary name first so a crash never leaves a half-written entry
+    data.to_pickle(data_path + '.tmp')
+    os.replace(data_path + '.tmp', data_path)
+    with open(info_path, 'w') as f:
+        json.dump(dict(info, key=key, created=time.time(), rows=len(data)),
+                  f, indent=2, default=str)
+
+    evict(cache_dir, max_bytes)
+
+
+def list_entries(cache_dir: str = CACHE_DIR) -> pd.DataFrame:
+    entries = []
+    if os.path.isdir(cache_dir):
+        for name in os.listdir(cache_dir):
+            if not name.endswith('.pkl'):
+                continue
+            key = name[:-len('.pkl')]
+            data_path, info_path = _entry_paths(key, cache_dir)
+            info = {}
+            if os.path.exists(info_path):
+                with open(info_path) as f:
+                    info = json.load(f)
+            entries.append({
+                'key': key,
+                'stage': info.get('settings', {}).get('stage'),
+                'inputs': info.get('input_paths'),
+                'rows': info.get('rows'),
+                'bytes': os.path.getsize(data_path),
+                'last_used': pd.Timestamp(os.path.getmtime(data_path), unit='s')
+            })
+    columns = ['key', 'stage', 'inputs', 'rows', 'bytes', 'last_used']
+    return pd.DataFrame(entries, columns=columns).sort_values('last_used', ascending=False)
+
+
+def evict(cache_dir: str = CACHE_DIR, max_bytes: int = MAX_CACHE_BYTES) -> List[str]:
+    """
+    Removes least recently used entries until the cache fits in max_bytes.
+    """
+    entries = list_entries(cache_dir)
+    total = entries['bytes'].sum()
+    removed = []
+    for key, size in zip(entries['key'][::-1], entries['bytes'][::-1]):
+        if total <= max_bytes:
+            break
+        remove(key, cache_dir)
+        total -= size
+        removed.append(key)
+    return removed
+
+
+def remove(key: str, cache_dir: str = CACHE_DIR) -> None:
+    for path in _entry_paths(key, cache_dir):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def clear(cache_dir: str = CACHE_DIR) -> int:
+    entries = list_entries(cache_dir)
+    for key in entries['key']:
+        remove(key, cache_dir)
+    return len(entries)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Inspect or clear the preprocessing cache.')
+    parser.add_argument('command', choices=['list', 'info', 'clear', 'evict'])
+    parser.add_argument('key', nargs='?', help='entry key (for info)')
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--max-bytes', type=int, default=MAX_CACHE_BYTES)
+    args = parser.parse_args(argv)
+
+    if args.command == 'list':
+        entries = list_entries(args.cache_dir)
+        print(entries.to_string(index=False) if len(entries) else 'Cache is empty.')
+        print('Total size:', int(entries['bytes'].sum()), 'bytes')
+    elif args.command == 'info':
+        if args.key is None:
+            parser.error('info needs an entry key (see "list")')
+        _, info_path = _entry_paths(args.key, args.cache_dir)
+        if not os.path.exists(info_path):
+            parser.error(f'no cache entry {args.key} in {args.cache_dir}')
+        with open(info_path) as f:
+            print(f.read())
+    elif args.command == 'clear':
+        print('Removed', clear(args.cache_dir), 'entries')
+    elif args.command == 'evict':
+        print('Removed', len(evict(args.cache_dir, args.max_bytes)), 'entries')
+
+
+if __name__ == "__main__":
+    main()
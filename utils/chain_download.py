@@ -0,0 +1,172 @@
+import hashlib
+import os
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+import ric_codes
+from option_ric_tools_new import get_client, query_window
+
+PRICE_FIELDS = ['TRDPRC_1']
+
+
+class SummariesClient:
+    """
+    Multi-RIC get_history on top of a client that only offers the single-RIC
+    get_historical_price_summaries (such as rdp). The per-RIC requests of a
+    batch run concurrently in a thread pool. Without a client the shared
+    session from get_client() is used, opened on the first request.
+    """
+
+    def __init__(self, client=None, max_workers: int = 8):
+        self.client = client
+        self.max_workers = max_workers
+
+    def get_history(self, universe, fields, start, end):
+        if self.client is None:
+            self.client = get_client()
+
+        def fetch(ric):
+            return ric, self.client.get_historical_price_summaries(
+                ric, start=start, end=end, interval=self.client.Intervals.DAILY, fields=fields)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            responses = dict(executor.map(fetch, universe))
+
+        frames = {ric: df for ric, df in responses.items() if df is not None and not df.empty}
+        return pd.concat(frames, axis=1) if frames else None
+
+
+def _request_key(universe, fields, start, end) -> str:
+    payload = repr((list(universe), list(fields), str(start), str(end)))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class RecordingClient:
+    """
+    Wraps a get_history client and saves every response to record_dir, so a
+    download can later be replayed offline with RecordedClient.
+    """
+
+    def __init__(self, client, record_dir: str):
+        self.client = client
+        self.record_dir = record_dir
+        os.makedirs(record_dir, exist_ok=True)
+
+    def get_history(self, universe, fields, start, end):
+        response = self.client.get_history(universe=universe, fields=fields, start=start, end=end)
+        path = os.path.join(self.record_dir, _request_key(universe, fields, start, end) + '.pkl')
+        with open(path, 'wb') as f:
+            pickle.dump(response, f)
+        return response
+
+
+class RecordedClient:
+    """
+    Replays responses saved by RecordingClient; requests that were never
+    recorded get no data (None), like unknown RICs on the live platform.
+    """
+
+    def __init__(self, record_dir: str):
+        self.record_dir = record_dir
+
+    def get_history(self, universe, fields, start, end):
+        path = os.path.join(self.record_dir, _request_key(universe, fields, start, end) + '.pkl')
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+
+def fetch_history(client, rics: List[str], start: str, end: str,
+                  fields: List[str] = PRICE_FIELDS, batch_size: int = 100) -> Dict[str, pd.DataFrame]:
+    """
+    Daily history for many RICs in batches of batch_size RICs per request.
+    Returns ric -> DataFrame (date index, one column per field) for every
+    RIC that has data.
+    """
+    history = {}
+    for i in range(0, len(rics), batch_size):
+        batch = rics[i:i + batch_size]
+        wide = client.get_history(universe=batch, fields=fields, start=start, end=end)
+        if wide is None or wide.empty:
+            continue
+        for ric in batch:
+            if ric in wide.columns.get_level_values(0):
+                frame = wide[ric].dropna(how='all')
+                if not frame.empty:
+                    history[ric] = frame
+    return history
+
+
+def download_chain(underlying: str,
+                   expirations: List[str],
+                   strikes: List[float],
+                   ticker: Optional[str] = None,
+                   opt_type: str = 'C',
+                   exchange: str = 'OPQ',
+                   out_path: Optional[str] = None,
+                   client=None,
+                   batch_size: int = 100,
+                   price_field: str = 'TRDPRC_1'):
+    """
+    Builds a raw chain in the long format process_delta_vega expects
+    (date, C, K, expiration_date, option_id, S).
+
+    For every expiration the candidate RICs of all strikes go out in a few
+    batched history requests together with the underlying, which is thus
+    fetched once per query window instead of once per strike. When out_path
+    is given it is replaced and rows are appended to it (CSV) expiration by
+    expiration, otherwise the chain is returned as a DataFrame.
+
+    client: anything with get_history(universe, fields, start, end), e.g.
+    SummariesClient (the default, on top of rdp) or RecordedClient offline.
+    """
+    ticker = ticker or underlying.split('.')[0]
+    client = client or SummariesClient()
+
+    # start from an empty output, so a download that finds no prices leaves no stale file
+    if out_path and os.path.exists(out_path):
+        os.remove(out_path)
+
+    chain = []
+    rows_written = 0
+    for expiration in sorted(pd.Timestamp(exp) for exp in expirations):
+        # all RICs of one expiration share the query window and the expired-RIC suffix
+        suffix, sdate, edate = query_window('', expiration, ric_codes.IDENT)
+        grid = ric_codes.candidate_rics(exchange, underlying, expiration, strikes, opt_type) + suffix
+        candidates = dict(zip(strikes, grid.tolist()))
+
+        universe = [underlying] + [ric for rics in candidates.values() for ric in rics]
+        history = fetch_history(client, universe, sdate, edate, [price_field], batch_size)
+        if underlying not in history:
+            print(f'No prices for {underlying} between {sdate} and {edate}, skipping {expiration.date()}')
+            continue
+        S = history[underlying][price_field].rename('S')
+
+        for strike, rics in candidates.items():
+            # several generations per strike on some exchanges: take the first with prices
+            ric = next((ric for ric in rics if ric in history), None)
+            if ric is None:
+                continue
+            option = history[ric][[price_field]].rename(columns={price_field: 'C'}).join(S, how='left')
+            option.index.name = 'date'
+            option = option.reset_index()
+            option['K'] = float(strike)
+            option['expiration_date'] = expiration.strftime('%Y-%m-%d')
+            option['option_id'] = f'{ticker}_{expiration:%Y-%m-%d}_K{float(strike):g}'
+            option = option[['date', 'C', 'K', 'expiration_date', 'option_id', 'S']]
+
+            if out_path:
+                option.to_csv(out_path, mode='w' if rows_written == 0 else 'a',
+                              header=rows_written == 0, index=False)
+                rows_written += len(option)
+            else:
+                chain.append(option)
+
+    if out_path:
+        return rows_written
+    columns = ['date', 'C', 'K', 'expiration_date', 'option_id', 'S']
+    return pd.concat(chain, ignore_index=True) if chain else pd.DataFrame(columns=columns)
@@ -1,8 +1,46 @@
-from typing import Dict, Any, List
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Dict, Any, List, Tuple
 import numpy as np
 import pandas as pd
 
 def delta_hedge(data: pd.DataFrame, hedge_frequency: int = 1) -> Dict[str, Any]:
+    """
+    data: DataFrame
+        Contains data for a single option series
+
+    Vectorized version of delta_hedge_old: the delta held over step i is
+    the delta at the last rebalance index (i - 1) // hedge_frequency * hedge_frequency.
+    """
+
+    data = data.sort_values(by='date').reset_index(drop=True)
+    N = len(data)
+
+    C = data['C'].to_numpy()
+    S = data['S'].to_numpy()
+    delta = data['delta'].to_numpy()
+
+    held = np.arange(N - 1) // hedge_frequency * hedge_frequency
+    error = np.diff(C) - delta[held] * np.diff(S)
+
+    error_df = pd.DataFrame({'TTM': data['TTM'].to_numpy()[1:], 'error': error})
+
+    result = {
+        'expiration_date' : data['expiration_date'].iloc[0],
+        'K' : data['K'].iloc[0],
+        'initial_moneyness' : data['initial_moneyness'].iloc[0],
+        'hedge_frequency' : hedge_frequency,
+        'errors' : error_df,
+        'mse' : np.mean(error_df['error']**2),
+        'mean_error' : np.mean(error_df['error']),
+        'std_error' : np.std(error_df['error'])
+    }
+    return result
+
+
+def delta_hedge_old(data: pd.DataFrame, hedge_frequency: int = 1) -> Dict[str, Any]:
     """
     data: DataFrame
         Contains data for a single option series
@@ -43,33 +81,180 @@ def delta_hedge(data: pd.DataFrame, hedge_frequency: int = 1) -> Dict[str, Any]:
     return result
 
 
-def run_delta_hedge_analysis(data: pd.DataFrame,
-                             frequencies: List[int]) -> pd.DataFrame:
+DELTA_HEDGE_COLUMNS = ['date', 'C', 'S', 'delta', 'TTM', 'expiration_date',
+                       'K', 'initial_moneyness', 'option_id']
+DELTA_VEGA_HEDGE_COLUMNS = DELTA_HEDGE_COLUMNS + ['vega']
+
+
+def worker_count(n_jobs: int) -> int:
+    """
+    Number of worker processes for an n_jobs argument: -1 for all cores,
+    anything below 1 runs serially.
+    """
+    if n_jobs == -1:
+        return os.cpu_count() or 1
+    return max(n_jobs, 1)
+
+
+def _shard_by_expiration(data: pd.DataFrame,
+                         columns: List[str]) -> List[pd.DataFrame]:
+    # options never cross expirations, so each expiration is an independent unit of work
+    return [shard for _, shard in data[columns].groupby('expiration_date', sort=True)]
+
+
+def _merge_shard_results(parts) -> List[Dict[str, Any]]:
+    # shards finish in any order, the sort keys restore the serial ordering
+    keyed = [item for part in parts for item in part]
+    keyed.sort(key=lambda item: item[0])
+    return [res for _, res in keyed]
+
+
+def _delta_hedge_shard(data: pd.DataFrame,
+                       frequencies: List[int]) -> List[Tuple[tuple, Dict[str, Any]]]:
     results = []
 
-    for mon in ['ATM', 'ITM', 'OTM']:
+    for mon_rank, mon in enumerate(['ATM', 'ITM', 'OTM']):
         data_mon = data[data['initial_moneyness'] == mon].copy()
 
-        for freq in frequencies:
-            for _, opt_data in data_mon.groupby('option_id'):
+        for freq_rank, freq in enumerate(frequencies):
+            for option_id, opt_data in data_mon.groupby('option_id', observed=True):
                 res = delta_hedge(data = opt_data,
                                 hedge_frequency = freq)
                 if res is not None:
-                    results.append(res)
+                    results.append(((mon_rank, freq_rank, option_id), res))
                 else:
                     print(f"Skipping option_id {opt_data['option_id'].iloc[0]}.")
-        
+
+    return results
+
+
+def run_delta_hedge_analysis(data: pd.DataFrame,
+                             frequencies: List[int],
+                             n_jobs: int = 1) -> pd.DataFrame:
+    """
+    n_jobs: int
+        Number of worker processes. With n_jobs > 1 (or -1 for all cores) the
+        work is sharded by expiration_date across a process pool; the summary
+        is identical to the serial run.
+    """
+    n_workers = worker_count(n_jobs)
+
+    if n_workers == 1:
+        parts = [_delta_hedge_shard(data, frequencies)]
+    else:
+        shards = _shard_by_expiration(data, DELTA_HEDGE_COLUMNS)
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            parts = list(executor.map(_delta_hedge_shard, shards, repeat(frequencies)))
+
+    summary = pd.DataFrame(_merge_shard_results(parts))
+    return summary
+
+def pad_option_panel(data: pd.DataFrame,
+                     columns: List[str]) -> Dict[str, Any]:
+    """
+    Sorts and groups every option once and lays the given columns out as
+    NaN-padded 2-D arrays of shape (n_options, max_length), one row per
+    option_id (in sorted order) and one column per trading day.
+    """
+    data = data.sort_values(['option_id', 'date'], kind='stable')
+    option_ids, codes = np.unique(data['option_id'].to_numpy(), return_inverse=True)
+
+    lengths = np.bincount(codes, minlength=len(option_ids))
+    starts = np.cumsum(lengths) - lengths
+    position = np.arange(len(data)) - starts[codes]
+    width = lengths.max() if len(lengths) else 0
+
+    panel = {}
+    for col in columns:
+        values = np.full((len(option_ids), width), np.nan)
+        values[codes, position] = data[col].to_numpy(dtype=float)
+        panel[col] = values
+
+    return {
+        'option_id': option_ids,
+        'length': lengths,
+        'first_rows': data.iloc[starts].reset_index(drop=True),
+        'values': panel
+    }
+
+
+def run_delta_hedge_batch(data: pd.DataFrame,
+                          frequencies: List[int],
+                          return_errors: bool = True) -> pd.DataFrame:
+    """
+    Same summary as run_delta_hedge_analysis, but every option is sorted and
+    grouped once and all (option, frequency) pairs are hedged on a padded
+    2-D layout. With return_errors=False the per-option error frames are
+    skipped, which is much cheaper on large frequency grids.
+    """
+    panel = pad_option_panel(data, ['C', 'S', 'delta', 'TTM'])
+    first_rows = panel['first_rows']
+    lengths = panel['length']
+    C, S, delta, TTM = (panel['values'][col] for col in ['C', 'S', 'delta', 'TTM'])
+
+    dC = np.diff(C, axis=1)
+    dS = np.diff(S, axis=1)
+    steps = np.arange(dC.shape[1])
+
+    results = []
+    for mon in ['ATM', 'ITM', 'OTM']:
+        rows = np.flatnonzero(first_rows['initial_moneyness'].to_numpy() == mon)
+
+        for freq in frequencies:
+            held = steps // freq * freq
+            error = dC[rows] - delta[rows][:, held] * dS[rows]
+
+            with np.errstate(invalid='ignore'), warnings.catch_warnings():
+                # options with no valid step give NaN statistics, as before
+                warnings.simplefilter('ignore', category=RuntimeWarning)
+                mse = np.nanmean(error ** 2, axis=1)
+                mean_error = np.nanmean(error, axis=1)
+                std_error = np.nanstd(error, axis=1)
+
+            for j, row in enumerate(rows):
+                res = {
+                    'expiration_date' : first_rows.at[row, 'expiration_date'],
+                    'K' : first_rows.at[row, 'K'],
+                    'initial_moneyness' : mon,
+                    'hedge_frequency' : freq,
+                    'mse' : mse[j],
+                    'mean_error' : mean_error[j],
+                    'std_error' : std_error[j]
+                }
+                if return_errors:
+                    n = lengths[row] - 1
+                    res['errors'] = pd.DataFrame({'TTM': TTM[row, 1:n + 1],
+                                                  'error': error[j, :n]})
+                results.append(res)
+
     summary = pd.DataFrame(results)
+    if return_errors and not summary.empty:
+        summary = summary[['expiration_date', 'K', 'initial_moneyness', 'hedge_frequency',
+                           'errors', 'mse', 'mean_error', 'std_error']]
     return summary
 
-def delta_vega_hedge(target_data: pd.DataFrame,
-                     rep_data: pd.DataFrame,
-                     hedge_frequency: int = 1) -> Dict[str, Any]:
+def build_option_index(data: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, slice]]:
     """
-    data: DataFrame
-        Contains data for a single option series
+    Sorts data by (option_id, date) once and returns it together with an
+    option_id -> slice mapping, so each option's rows are a contiguous
+    .iloc slice instead of a full-table boolean scan.
+    """
+    data = data.sort_values(['option_id', 'date'], kind='stable').reset_index(drop=True)
+    ids = data['option_id'].to_numpy()
+
+    starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]]) if len(ids) else np.array([], dtype=int)
+    ends = np.r_[starts[1:], len(ids)]
+
+    index = {ids[start]: slice(start, end) for start, end in zip(starts, ends)}
+    return data, index
+
+
+def align_rep_data(target_data: pd.DataFrame,
+                   rep_data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aligns the replicating option on the (date-sorted) target date grid.
+    Returns None if the replicating option is missing any of those dates.
     """
-    target_data = target_data.sort_values(by='date').reset_index(drop=True).copy()
     rep_data = rep_data.sort_values('date').copy()
 
     # align rep_date on target date gird
@@ -79,8 +264,89 @@ def delta_vega_hedge(target_data: pd.DataFrame,
 
     if rep_data[['C', 'delta', 'vega']].isna().any().any():
         return None
-    
-    rep_data = rep_data.reset_index().rename(columns={'index': 'date'})
+
+    return rep_data.reset_index().rename(columns={'index': 'date'})
+
+
+def delta_vega_hedge(target_data: pd.DataFrame,
+                     rep_data: pd.DataFrame,
+                     hedge_frequency: int = 1) -> Dict[str, Any]:
+    """
+    data: DataFrame
+        Contains data for a single option series
+    """
+    target_data = target_data.sort_values(by='date').reset_index(drop=True).copy()
+    rep_data = align_rep_data(target_data, rep_data)
+    if rep_data is None:
+        return None
+
+    ratios = delta_vega_hedge_ratios(target_data, rep_data)
+    return _delta_vega_hedge_from_ratios(target_data, ratios, hedge_frequency)
+
+
+def delta_vega_hedge_ratios(target_data: pd.DataFrame,
+                            rep_data: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """
+    Price changes and hedge ratios of an aligned (target, replicating) pair,
+    computed once so they can be gathered for any hedge frequency.
+    """
+    delta_target = target_data['delta'].to_numpy()
+    delta_rep = rep_data['delta'].to_numpy()
+    vega_target = target_data['vega'].to_numpy()
+    vega_rep = rep_data['vega'].to_numpy()
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        amount_rep = vega_target / vega_rep
+        amount_S = delta_target - (vega_target / vega_rep) * delta_rep
+
+    return {
+        'dC_target': np.diff(target_data['C'].to_numpy()),
+        'dS_target': np.diff(target_data['S'].to_numpy()),
+        'dC_rep': np.diff(rep_data['C'].to_numpy()),
+        'amount_S': amount_S,
+        'amount_rep': amount_rep,
+        'zero_vega': vega_rep == 0
+    }
+
+
+def _delta_vega_hedge_from_ratios(target_data: pd.DataFrame,
+                                  ratios: Dict[str, np.ndarray],
+                                  hedge_frequency: int) -> Dict[str, Any]:
+    N = len(target_data)
+
+    # a zero replicating vega at any rebalance date makes the hedge undefined
+    if ratios['zero_vega'][::hedge_frequency].any():
+        return None
+
+    held = np.arange(N - 1) // hedge_frequency * hedge_frequency
+    error = ratios['dC_target'] - (ratios['amount_S'][held] * ratios['dS_target']
+                                   + ratios['amount_rep'][held] * ratios['dC_rep'])
+
+    error_df = pd.DataFrame({'TTM': target_data['TTM'].to_numpy()[1:], 'error': error})
+    result = {
+        'expiration_date' : target_data['expiration_date'].iloc[0],
+        'K' : target_data['K'].iloc[0],
+        'initial_moneyness' : target_data['initial_moneyness'].iloc[0],
+        'hedge_frequency' : hedge_frequency,
+        'errors' : error_df,
+        'mse' : np.mean(error_df['error']**2),
+        'mean_error' : np.mean(error_df['error']),
+        'std_error' : np.std(error_df['error'])
+    }
+    return result
+
+
+def delta_vega_hedge_old(target_data: pd.DataFrame,
+                         rep_data: pd.DataFrame,
+                         hedge_frequency: int = 1) -> Dict[str, Any]:
+    """
+    data: DataFrame
+        Contains data for a single option series
+    """
+    target_data = target_data.sort_values(by='date').reset_index(drop=True).copy()
+    rep_data = align_rep_data(target_data, rep_data)
+    if rep_data is None:
+        return None
 
     N = len(target_data)
 
@@ -135,29 +401,27 @@ def delta_vega_hedge(target_data: pd.DataFrame,
     }
     return result
 
-def run_delta_vega_hedge_analysis(data: pd.DataFrame,
-                                  pairs: pd.DataFrame,
-                                  frequencies: List[int]) -> pd.DataFrame:
-    # ensure expiration_date is datetime
-    data = data.copy()
-    data['expiration_date'] = pd.to_datetime(data['expiration_date'])
-    data['date'] = pd.to_datetime(data['date'])
-
-    # build mapping: target option_id -> hedge_option_id
-    pair_map: Dict[str, str] = (
-        pairs.drop_duplicates(subset=['option_id'])
-             .set_index('option_id')['hedge_option_id']
-             .to_dict()
-    )
+def _delta_vega_hedge_shard(targets: pd.DataFrame,
+                            data: pd.DataFrame,
+                            pair_map: Dict[str, str],
+                            frequencies: List[int]) -> List[Tuple[tuple, Dict[str, Any]]]:
+    """
+    targets: DataFrame
+        Options to hedge
+    data: DataFrame
+        Rows the hedge partners are looked up in
+    """
+    results = []
 
-    results: List[Dict[str, Any]] = []
+    # one sort up front, then every partner lookup is an O(1) slice
+    data, option_index = build_option_index(data)
 
     # loop over moneyness buckets
-    for mon in ['ATM', 'ITM', 'OTM']:
-        data_mon = data[data['initial_moneyness'] == mon].copy()
+    for mon_rank, mon in enumerate(['ATM', 'ITM', 'OTM']):
+        data_mon = targets[targets['initial_moneyness'] == mon].copy()
 
         # group by target option_id
-        for option_id, opt_data in data_mon.groupby('option_id'):
+        for option_id, opt_data in data_mon.groupby('option_id', observed=True):
 
             # check if this option has a hedge partner
             if option_id not in pair_map:
@@ -165,9 +429,9 @@ def run_delta_vega_hedge_analysis(data: pd.DataFrame,
                 continue
 
             hedge_id = pair_map[option_id]
-            rep_data = data[data['option_id'] == hedge_id].copy()
-            if rep_data.empty:
+            if hedge_id not in option_index:
                 continue
+            rep_data = data.iloc[option_index[hedge_id]]
 
             # restrict target to last 45 *calendar* days before its maturity
             # (if you already did this earlier, this is just a safeguard)
@@ -179,21 +443,88 @@ def run_delta_vega_hedge_analysis(data: pd.DataFrame,
             if len(target_45) < 2:
                 continue
 
-            for freq in frequencies:
-                res = delta_vega_hedge(
+            # align the pair once, independent of the number of frequencies
+            target_45 = target_45.reset_index(drop=True)
+            rep_aligned = align_rep_data(target_45, rep_data)
+            if rep_aligned is None:
+                continue
+
+            ratios = delta_vega_hedge_ratios(target_45, rep_aligned)
+
+            for freq_rank, freq in enumerate(frequencies):
+                res = _delta_vega_hedge_from_ratios(
                     target_data=target_45,
-                    rep_data=rep_data,
+                    ratios=ratios,
                     hedge_frequency=freq
                 )
                 if res is not None:
-                    results.append(res)
+                    results.append(((mon_rank, option_id, freq_rank), res))
                 else:
                     # e.g. missing alignment or zero vega
                     # print(f"Skipping option_id {option_id} at freq={freq}.")
                     pass
 
-    summary = pd.DataFrame(results)
-    return summary
+    return results
+
+
+def hedge_pairs(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Target -> hedge option pairs for run_delta_vega_hedge_analysis: the
+    option with the same strike at the next expiration (as in the notebooks).
+    """
+    per_option = data[['option_id', 'K', 'expiration_date']].drop_duplicates().copy()
+    per_option['expiration_date'] = pd.to_datetime(per_option['expiration_date'])
 
+    expiries = sorted(per_option['expiration_date'].unique())
+    next_expiry_map = dict(zip(expiries[:-1], expiries[1:]))
+    per_option['next_expiration'] = per_option['expiration_date'].map(next_expiry_map)
 
+    left = per_option.dropna(subset=['next_expiration'])
+    right = per_option.rename(columns={'option_id': 'hedge_option_id',
+                                       'expiration_date': 'hedge_expiration'})
+    return left.merge(right[['hedge_option_id', 'K', 'hedge_expiration']],
+                      left_on=['K', 'next_expiration'],
+                      right_on=['K', 'hedge_expiration'],
+                      how='inner')
 
+
+def run_delta_vega_hedge_analysis(data: pd.DataFrame,
+                                  pairs: pd.DataFrame,
+                                  frequencies: List[int],
+                                  n_jobs: int = 1) -> pd.DataFrame:
+    """
+    n_jobs: int
+        Number of worker processes, see run_delta_hedge_analysis. Each worker
+        receives its expiration's targets plus the rows of their hedge partners.
+    """
+    # ensure expiration_date is datetime
+    data = data.copy()
+    data['expiration_date'] = pd.to_datetime(data['expiration_date'])
+    data['date'] = pd.to_datetime(data['date'])
+
+    # build mapping: target option_id -> hedge_option_id
+    pair_map: Dict[str, str] = (
+        pairs.drop_duplicates(subset=['option_id'])
+             .set_index('option_id')['hedge_option_id']
+             .to_dict()
+    )
+
+    n_workers = worker_count(n_jobs)
+
+    if n_workers == 1 or data.empty:
+        parts = [_delta_vega_hedge_shard(data, data, pair_map, frequencies)]
+    else:
+        jobs = []
+        for targets in _shard_by_expiration(data, DELTA_VEGA_HEDGE_COLUMNS):
+            shard_map = {oid: pair_map[oid] for oid in targets['option_id'].unique()
+                         if oid in pair_map}
+            partners = data.loc[data['option_id'].isin(list(shard_map.values())),
+                                DELTA_VEGA_HEDGE_COLUMNS]
+            jobs.append((targets, partners, shard_map))
+
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            parts = list(executor.map(_delta_vega_hedge_shard,
+                                      *zip(*jobs), repeat(frequencies)))
+
+    summary = pd.DataFrame(_merge_shard_results(parts))
+    return summary
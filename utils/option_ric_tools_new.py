@@ -1,15 +1,58 @@
-import refinitiv.dataplatform as rdp
+import hashlib
+import os
+import threading
 import pandas as pd
+import ric_codes
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
 from datetime import datetime
 
-rdp.open_desktop_session('DEFAULT_CODE_BOOK_APP_KEY')
+APP_KEY = 'DEFAULT_CODE_BOOK_APP_KEY'
 
+# positive and negative price lookups, keyed by (RIC, query window)
+RIC_CACHE_DIR = 'data/cache/ric'
 
-def get_exchange_code(asset):
+# one data-platform session per process, opened on the first request that needs it
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Shared data-platform client. The refinitiv import and the desktop session
+    are deferred to the first call, so importing this module is instant and
+    works offline; later calls (from any thread) reuse the same session.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                import refinitiv.dataplatform as rdp
+                rdp.open_desktop_session(APP_KEY)
+                _client = rdp
+    return _client
+
+
+def set_client(client):
+    # inject a client (e.g. a local stub) used wherever no client is passed explicitly
+    global _client
+    with _client_lock:
+        _client = client
+
+
+def close_client():
+    global _client
+    with _client_lock:
+        if _client is not None and hasattr(_client, 'close_session'):
+            _client.close_session()
+        _client = None
+
+
+def get_exchange_code(asset, client = None):
+    client = client or get_client()
     
     # build search query to find exchange codes where the option on the given underlying is traded  
-    response = rdp.Search.search(
+    response = client.Search.search(
         query = asset,
         filter = "SearchAllCategory eq 'Options' and Periodicity eq 'Monthly' ",
         select = ' RIC, DocumentTitle, UnderlyingQuoteRIC,Periodicity, ExchangeCode',
@@ -26,7 +69,7 @@ def get_exchange_code(asset):
     return exchange_codes
 
 
-def check_ric(ric, maturity, ident, get_prices = True):
+def query_window(ric, maturity, ident):
     exp_date = pd.Timestamp(maturity)
     
     # get start and end date for get_historical_price_summaries query (take current date minus 90 days period)
@@ -39,19 +82,89 @@ def check_ric(ric, maturity, ident, get_prices = True):
         ric = ric + '^' + ident[str(exp_date.month)]['exp'] + str(exp_date.year)[-2:]
         sdate = (exp_date - timedelta(90)).strftime('%Y-%m-%d')
         edate = exp_date.strftime('%Y-%m-%d')
+    return ric, sdate, edate
+
+
+def _cache_path(ric, sdate, edate, cache_dir):
+    key = hashlib.sha256(f'{ric}|{sdate}|{edate}'.encode()).hexdigest()
+    return os.path.join(cache_dir, f'{key}.pkl')
+
+
+def check_ric(ric, maturity, ident, get_prices = True, client = None, cache_dir = None):
+    # client: data-platform client (defaults to get_client()), cache_dir: on-disk result cache (off if None)
+    client = client or get_client()
+    ric, sdate, edate = query_window(ric, maturity, ident)
     
     prices = None
     if get_prices:
+        path = _cache_path(ric, sdate, edate, cache_dir) if cache_dir else None
+        if path and os.path.exists(path):
+            # cached hit or cached miss (None)
+            return ric, pd.read_pickle(path)
+
         # request option prices. Please note, there is no settle price for OPRA traded options
         if ric.split('.')[1][0] == 'U':
-            prices = rdp.get_historical_price_summaries(ric,  start = sdate, end = edate, interval = rdp.Intervals.DAILY,
+            prices = client.get_historical_price_summaries(ric,  start = sdate, end = edate, interval = client.Intervals.DAILY,
                                                     fields = ['BID','ASK','TRDPRC_1'])
         else:
-            prices = rdp.get_historical_price_summaries(ric,  start = sdate, end = edate, interval = rdp.Intervals.DAILY,
+            prices = client.get_historical_price_summaries(ric,  start = sdate, end = edate, interval = client.Intervals.DAILY,
                                                     fields = ['BID','ASK','TRDPRC_1', 'SETTLE'])
+
+        if path:
+            os.makedirs(cache_dir, exist_ok=True)
+            pd.to_pickle(prices, path + f'.{os.getpid()}.tmp')
+            os.replace(path + f'.{os.getpid()}.tmp', path)
     return ric, prices
 
 
+def first_valid_ric(candidates, maturity, ident, get_prices = True, client = None, cache_dir = None):
+    # check candidates one after another and return the first one with prices
+    possible_rics = []
+    for ric in candidates:
+        ric, prices = check_ric(ric, maturity, ident, get_prices, client, cache_dir)
+        if prices is not None:
+            return ric, prices
+        possible_rics.append(ric)
+    print(f'Here is a list of possible RICs {possible_rics}, however we could not find any prices for those!')
+    return ric, prices
+
+
+def resolve_rics(candidate_lists, maturity, get_prices = True, max_workers = 8,
+                 client = None, cache_dir = RIC_CACHE_DIR):
+    """
+    Probes several candidate lists concurrently.
+
+    candidate_lists: list of (candidates, ident) pairs, e.g. one per exchange
+    Every candidate of every list is submitted to one thread pool (at most
+    max_workers requests in flight). For each list the first candidate, in
+    list order, that has prices is returned, so results are the same as
+    checking serially. Returns a list of (ric, prices) with prices None
+    if no candidate of the list has prices.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            [executor.submit(check_ric, ric, maturity, ident, get_prices, client, cache_dir)
+             for ric in candidates]
+            for candidates, ident in candidate_lists
+        ]
+
+        results = []
+        for list_futures in futures:
+            ric, prices = None, None
+            for i, future in enumerate(list_futures):
+                ric, prices = future.result()
+                if prices is not None:
+                    # later candidates of this list are not needed any more
+                    for pending in list_futures[i + 1:]:
+                        pending.cancel()
+                    break
+            if prices is None:
+                print(f'Here is a list of possible RICs {[f.result()[0] for f in list_futures]}, '
+                      'however we could not find any prices for those!')
+            results.append((ric, prices))
+    return results
+
+
 def get_exp_month(exp_date, opt_type):
     
     # define option expiration identifiers
@@ -77,7 +190,7 @@ def get_exp_month(exp_date, opt_type):
     return ident, exp_month
 
 
-def get_ric_opra(asset, maturity, strike, opt_type, get_prices = True):
+def rics_opra_old(asset, maturity, strike, opt_type):
     exp_date = pd.Timestamp(maturity)
     
     # trim underlying asset's RIC to get the required part for option RIC
@@ -142,20 +255,15 @@ def get_ric_opra(asset, maturity, strike, opt_type, get_prices = True):
         
     # build initial ric
     ric = asset_name + exp_month + str(exp_date.day) + str(exp_date.year)[-2:] + strike_ric + '.U'
-    # check ric validity
-    ric, prices = check_ric(ric, maturity, ident, get_prices)
-    
-    # return valid rics or append to the possible_ric list if no price is found
-    possible_rics = [] 
-    if prices is not None:
-        return ric, prices
-    else:
-        possible_rics.append(ric)
-        print(f'Here is a list of possible RICs {possible_rics}, however we could not find any prices for those!')
-    return ric, prices
+    return [ric], ident
+
 
+def get_ric_opra(asset, maturity, strike, opt_type, get_prices = True, client = None, cache_dir = None):
+    candidates, ident = rics_opra(asset, maturity, strike, opt_type)
+    return first_valid_ric(candidates, maturity, ident, get_prices, client, cache_dir)
 
-def get_ric_hk(asset, maturity, strike, opt_type, get_prices = True):
+
+def rics_hk_old(asset, maturity, strike, opt_type):
     exp_date = pd.Timestamp(maturity)
     
     # get asset name and strike price for the asset
@@ -169,31 +277,25 @@ def get_ric_hk(asset, maturity, strike, opt_type, get_prices = True):
     # get expiration month codes
     ident, exp_month = get_exp_month(exp_date, opt_type)
  
-    possible_rics = []
-    # get rics for options on indexes. Return if valid add to the possible_rics list if no price is found
+    candidates = []
+    # get rics for options on indexes
     if asset[0] == '.':
-        ric = asset_name + strike_ric + exp_month + str(exp_date.year)[-1:] + '.HF'
-        ric, prices = check_ric(ric, maturity, ident, get_prices)
-        if prices is not None:
-            return ric, prices
-        else:
-            possible_rics.append(ric)
+        candidates.append(asset_name + strike_ric + exp_month + str(exp_date.year)[-1:] + '.HF')
     else:
-        # get rics for options on equities. Return if valid add to the possible_rics list if no price is found
+        # get rics for options on equities
         # there could be several generations of options depending on the number of price adjustments due to a corporate event
-        # here we use 4 adjustment opportunities.
+        # here we use 4 adjustment opportunities. The first one with prices is used (we don't check for other adjusted rics)
         for i in range(4): 
-            ric = asset_name + strike_ric + str(i)+ exp_month + str(exp_date.year)[-1:] + '.HK'
-            ric, prices = check_ric(ric, maturity, ident, get_prices)
-            if prices is not None:
-                 return ric, prices # we return ric and prices for the first found ric (we don't check for other adjusted rics)
-            else:
-                possible_rics.append(ric)
-    print(f'Here is a list of possible RICs {possible_rics}, however we could not find any prices for those!')
-    return  ric, prices
+            candidates.append(asset_name + strike_ric + str(i)+ exp_month + str(exp_date.year)[-1:] + '.HK')
+    return candidates, ident
+
 
+def get_ric_hk(asset, maturity, strike, opt_type, get_prices = True, client = None, cache_dir = None):
+    candidates, ident = rics_hk(asset, maturity, strike, opt_type)
+    return first_valid_ric(candidates, maturity, ident, get_prices, client, cache_dir)
 
-def get_ric_ose(asset, maturity, strike, opt_type, get_prices = True):
+
+def rics_ose_old(asset, maturity, strike, opt_type):
     exp_date = pd.Timestamp(maturity)
  
     if asset[0] == '.':
@@ -204,7 +306,7 @@ def get_ric_ose(asset, maturity, strike, opt_type, get_prices = True):
         
     ident, exp_month = get_exp_month(exp_date, opt_type)
     
-    possible_rics = []
+    candidates = []
     if asset[0] == '.':
         # Option Root codes for indexes are different from the RIC, so we rename where necessery
         if asset_name == 'N225':
@@ -213,27 +315,21 @@ def get_ric_ose(asset, maturity, strike, opt_type, get_prices = True):
             asset_name = 'JTI'
         # we consider also J-NET (Off-Auction(with "L")) and High  frequency (with 'R') option structures 
         for jnet in ['', 'L', 'R']:
-            ric = asset_name + jnet + strike_ric + exp_month + str(exp_date.year)[-1:] + '.OS'
-            ric, prices = check_ric(ric, maturity, ident, get_prices)
-            if prices is not None:
-                return ric, prices
-            else:
-                possible_rics.append(ric)
+            candidates.append(asset_name + jnet + strike_ric + exp_month + str(exp_date.year)[-1:] + '.OS')
     else:
         generations = ['Y', 'Z', 'A', 'B', 'C'] # these are generation codes similar to one from HK 
         for jnet in ['', 'L', 'R']:
             for gen in generations:
-                ric = asset_name + jnet + gen + strike_ric + exp_month + str(exp_date.year)[-1:] + '.OS'
-                ric, prices = check_ric(ric, maturity, ident, get_prices)
-                if prices is not None:
-                    return ric, prices
-                else:
-                    possible_rics.append(ric)
-    print(f'Here is a list of possible RICs {possible_rics}, however we could not find any prices for those!')
-    return  ric, prices
+                candidates.append(asset_name + jnet + gen + strike_ric + exp_month + str(exp_date.year)[-1:] + '.OS')
+    return candidates, ident
 
 
-def get_ric_eurex(asset, maturity, strike, opt_type, get_prices = True):
+def get_ric_ose(asset, maturity, strike, opt_type, get_prices = True, client = None, cache_dir = None):
+    candidates, ident = rics_ose(asset, maturity, strike, opt_type)
+    return first_valid_ric(candidates, maturity, ident, get_prices, client, cache_dir)
+
+
+def rics_eurex_old(asset, maturity, strike, opt_type):
     exp_date = pd.Timestamp(maturity)
  
     if asset[0] == '.': 
@@ -265,20 +361,18 @@ def get_ric_eurex(asset, maturity, strike, opt_type, get_prices = True):
     else:
         strike_ric = str(int_part) + dec_part
     
-    possible_rics = []
     generations = ['', 'a', 'b', 'c', 'd']
-    for gen in generations:
-        ric = asset_name + strike_ric  + gen + exp_month + str(exp_date.year)[-1:] + '.EX'
-        ric, prices = check_ric(ric, maturity, ident, get_prices)
-        if prices is not None:
-            return ric, prices
-        else:
-            possible_rics.append(ric)
-    print(f'Here is a list of possible RICs {possible_rics}, however we could not find any prices for those!')
-    return  ric, prices
+    candidates = [asset_name + strike_ric  + gen + exp_month + str(exp_date.year)[-1:] + '.EX'
+                  for gen in generations]
+    return candidates, ident
+
+
+def get_ric_eurex(asset, maturity, strike, opt_type, get_prices = True, client = None, cache_dir = None):
+    candidates, ident = rics_eurex(asset, maturity, strike, opt_type)
+    return first_valid_ric(candidates, maturity, ident, get_prices, client, cache_dir)
 
 
-def get_ric_ieu(asset, maturity, strike, opt_type, get_prices = True):
+def rics_ieu_old(asset, maturity, strike, opt_type):
     exp_date = pd.Timestamp(maturity)
     
     if asset[0] == '.':
@@ -300,17 +394,45 @@ def get_ric_ieu(asset, maturity, strike, opt_type, get_prices = True):
         dec_part = str(str(strike).split('.')[1])[0]        
         strike_ric = '0' + str(int_part) + dec_part
     
-    possible_rics = []
     generations = ['', 'a', 'b', 'c', 'd']
-    for gen in generations:
-        ric = asset_name + strike_ric  + gen + exp_month + str(exp_date.year)[-1:] + '.L'
-        ric, prices = check_ric(ric, maturity, ident, get_prices)
-        if prices is not None:
-            return ric, prices
-        else:
-            possible_rics.append(ric)
-    print(f'Here is a list of possible RICs {possible_rics}, however we could not find any prices for those!')
-    return  ric, prices
+    candidates = [asset_name + strike_ric  + gen + exp_month + str(exp_date.year)[-1:] + '.L'
+                  for gen in generations]
+    return candidates, ident
+
+
+def get_ric_ieu(asset, maturity, strike, opt_type, get_prices = True, client = None, cache_dir = None):
+    candidates, ident = rics_ieu(asset, maturity, strike, opt_type)
+    return first_valid_ric(candidates, maturity, ident, get_prices, client, cache_dir)
+
+
+# candidate RICs of a single option, encoded through the lookup tables in ric_codes
+def rics_opra(asset, maturity, strike, opt_type):
+    return list(ric_codes.rics_opra(asset, maturity, strike, opt_type)[0]), ric_codes.IDENT
+
+
+def rics_hk(asset, maturity, strike, opt_type):
+    return list(ric_codes.rics_hk(asset, maturity, strike, opt_type)[0]), ric_codes.IDENT
+
+
+def rics_ose(asset, maturity, strike, opt_type):
+    return list(ric_codes.rics_ose(asset, maturity, strike, opt_type)[0]), ric_codes.IDENT
+
+
+def rics_eurex(asset, maturity, strike, opt_type):
+    return list(ric_codes.rics_eurex(asset, maturity, strike, opt_type)[0]), ric_codes.IDENT
+
+
+def rics_ieu(asset, maturity, strike, opt_type):
+    return list(ric_codes.rics_ieu(asset, maturity, strike, opt_type)[0]), ric_codes.IDENT
+
+
+# covered exchanges along with functions to get candidate RICs from
+EXCHANGE_RICS = {'OPQ': rics_opra,
+                 'IEU': rics_ieu,
+                 'EUX': rics_eurex,
+                 'HKG': rics_hk,
+                 'HFE': rics_hk,
+                 'OSA': rics_ose}
 
 
 def get_optionRic(isin, maturity, strike, opt_type, get_prices = True):
@@ -324,7 +446,7 @@ def get_optionRic(isin, maturity, strike, opt_type, get_prices = True):
            'OSA': get_ric_ose}
     
     # convert ISIN to RIC
-    df = rdp.convert_symbols( isin, from_symbol_type = "ISIN" , to_symbol_types = "RIC")
+    df = get_client().convert_symbols( isin, from_symbol_type = "ISIN" , to_symbol_types = "RIC")
     ricUnderlying = df['RIC'][0]
     
     # get exchanges codes where the option on the given asset is traded
@@ -343,3 +465,41 @@ def get_optionRic(isin, maturity, strike, opt_type, get_prices = True):
         else:
             print(f'The {exch} exchange is not supported yet')
     return option_rics, priceslist
+
+
+def get_optionRic_concurrent(isin, maturity, strike, opt_type, get_prices = True,
+                             max_workers = 8, client = None, cache_dir = RIC_CACHE_DIR):
+    """
+    Same result as get_optionRic, but all candidate RICs of all covered
+    exchanges are probed at once in a thread pool (at most max_workers
+    requests in flight) and every lookup goes through the on-disk cache.
+    client: data-platform client (defaults to get_client()), e.g. a local stub.
+    """
+    client = client or get_client()
+
+    # convert ISIN to RIC
+    df = client.convert_symbols( isin, from_symbol_type = "ISIN" , to_symbol_types = "RIC")
+    ricUnderlying = df['RIC'][0]
+
+    # get exchanges codes where the option on the given asset is traded
+    exchange_codes = get_exchange_code(ricUnderlying, client)
+
+    supported = []
+    for exch in exchange_codes:
+        if exch in EXCHANGE_RICS:
+            supported.append(exch)
+        else:
+            print(f'The {exch} exchange is not supported yet')
+
+    candidate_lists = [EXCHANGE_RICS[exch](ricUnderlying, maturity, strike, opt_type) for exch in supported]
+    results = resolve_rics(candidate_lists, maturity, get_prices, max_workers, client, cache_dir)
+
+    option_rics = []
+    priceslist = []
+    for exch, (ric, prices) in zip(supported, results):
+        if prices is not None:
+            option_rics.append(ric)
+            priceslist.append(prices)
+            print(f'Option RIC for {exch} exchange is successfully constructed')
+    return option_rics, priceslist
+
@@ -1,12 +1,72 @@
+import inspect
+import json
+import os
+import tempfile
+import time
 import numpy as np
 import pandas as pd
-from tools import get_delta, get_vega, implied_vol
+import cache
+from rates import RateCurve, as_rate_curve
+from tools import bs_greeks, implied_vol_vec
+
+
+RAW_DIR = 'data/raw'
+PROCESSED_DIR = 'data/processed'
+RATE_FILE = 'interest_rate.csv'
+# long-format raw chain: one row per option and trading day
+RAW_COLUMNS = ['date', 'C', 'K', 'expiration_date', 'option_id', 'S']
+
+CATEGORICAL_COLUMNS = ['option_id', 'initial_moneyness']
+DATETIME_COLUMNS = ['date', 'expiration_date']
+# none by default: prices and Greeks are differenced in the hedge errors, and
+# decimal strikes (152.3, 300.3) are not exact in float32 while K is a join key
+FLOAT32_COLUMNS = []
+
+
+def load_data(file_path: str, columns=None) -> pd.DataFrame:
+    """
+    Reads CSV, Parquet (.parquet) or Feather (.feather) files.
+    columns: optional list of columns to read (projected at read time for
+    the columnar formats).
+    """
+    suffix = os.path.splitext(file_path)[1].lower()
+    if suffix == '.parquet':
+        df = pd.read_parquet(file_path, columns=columns)
+    elif suffix == '.feather':
+        df = pd.read_feather(file_path, columns=columns)
+    else:
+        df = pd.read_csv(file_path, usecols=columns)
+    if 'date' in df.columns:
+        df['date'] = pd.to_datetime(df['date'])
+    return df
 
+def to_columnar(data: pd.DataFrame, float32_columns=FLOAT32_COLUMNS) -> pd.DataFrame:
+    """
+    Typed copy of an option panel for columnar storage: categorical ids and
+    moneyness labels, datetime64 dates and float32 for float32_columns.
+    """
+    data = data.reset_index(drop=True)
+    for col in data.columns:
+        if col in CATEGORICAL_COLUMNS:
+            data[col] = data[col].astype('category')
+        elif col in DATETIME_COLUMNS:
+            data[col] = pd.to_datetime(data[col])
+        elif col in float32_columns:
+            data[col] = data[col].astype(np.float32)
+    return data
 
-def load_data(file_path: str) -> pd.DataFrame:
-    df = pd.read_csv(file_path)
-    df['date'] = pd.to_datetime(df['date'])
-    return df
+def save_data(data: pd.DataFrame, file_path: str) -> None:
+    """
+    Writes CSV as before, or a typed Parquet/Feather file depending on the
+    extension. The columnar formats need pyarrow.
+    """
+    suffix = os.path.splitext(file_path)[1].lower()
+    if suffix == '.parquet':
+        to_columnar(data).to_parquet(file_path, index=False)
+    elif suffix == '.feather':
+        to_columnar(data).to_feather(file_path)
+    else:
+        data.to_csv(file_path, index=False)
 
 def construct_validation_table(data: pd.DataFrame) -> pd.DataFrame:
     nan_counts = (
@@ -69,6 +129,52 @@ def validate_option_history(data, all_trading_days):
     is_correct = actual_trading_days.equals(expected_trading_days)
     return is_correct
 
+def validate_option_histories(data, all_trading_days, window_days=90, return_missing=False):
+    """
+    Vectorized validate_option_history for all options at once.
+
+    Every date is mapped to its trading-day ordinal once; an option is valid
+    if its distinct ordinals cover exactly the expected window
+    [expiration - window_days, expiration] (same count, first and last day).
+    Returns a frame with option_id and is_valid, plus the list of missing
+    trading days per option in missing_dates if return_missing is set.
+    """
+    days = all_trading_days.to_numpy()
+    data = data[['option_id', 'date', 'expiration_date']].sort_values('date', kind='stable')
+    data = data.assign(ordinal=np.searchsorted(days, data['date'].to_numpy()))
+
+    per_option = data.groupby('option_id', observed=True).agg(
+        expiration=('expiration_date', 'first'),
+        n_days=('ordinal', 'nunique'),
+        first_day=('ordinal', 'min'),
+        last_day=('ordinal', 'max'),
+    )
+
+    expiration = per_option['expiration'].to_numpy()
+    window_start = np.searchsorted(days, expiration - np.timedelta64(window_days, 'D'), side='left')
+    window_end = np.searchsorted(days, expiration, side='right')
+
+    per_option['is_valid'] = (
+        (per_option['n_days'].to_numpy() == window_end - window_start)
+        & (per_option['first_day'].to_numpy() == window_start)
+        & (per_option['last_day'].to_numpy() == window_end - 1)
+    )
+    validation = per_option[['is_valid']].reset_index()
+
+    if return_missing:
+        ordinals = data.groupby('option_id', observed=True)['ordinal'].unique()
+        missing = []
+        for option_id, start, end, is_valid in zip(per_option.index, window_start,
+                                                   window_end, per_option['is_valid']):
+            if is_valid:
+                missing.append([])
+            else:
+                expected = np.arange(start, end)
+                missing.append(list(all_trading_days[np.setdiff1d(expected, ordinals[option_id])]))
+        validation['missing_dates'] = missing
+
+    return validation
+
 def classify_moneyness(delta):
     if delta >= 0.65:
         return 'ITM'
@@ -79,188 +185,443 @@ def classify_moneyness(delta):
     else:
         return None
 
-# processing for TSLA dataset structure
-def process(data, r):
-    data['date'] = pd.to_datetime(data['date'])
-    data['expiration_date'] = pd.to_datetime(data['expiration_date'])
-
-    all_trading_days = pd.Index(sorted(data['date'].unique()))
-
-    # add TTM and restrict to 45 days
-    data = data[(data['expiration_date'] - data['date']).dt.days <= 45]
-    data['TTM'] = (data['expiration_date'] - data['date']).dt.days / 365.0
-
-    
+class Stage:
+    """
+    One step of the preprocessing pipeline.
+
+    needs / produces: columns the stage reads and the columns it adds.
+    Filter stages only drop rows and always run.
+    """
+
+    def __init__(self, name, func, needs=(), produces=(), is_filter=False):
+        self.name = name
+        self.func = func
+        self.needs = tuple(needs)
+        self.produces = tuple(produces)
+        self.is_filter = is_filter
+
+    def __repr__(self):
+        return f'Stage({self.name!r}, needs={list(self.needs)}, produces={list(self.produces)})'
+
+
+class PipelineReport:
+    """
+    Per-stage counters of one Pipeline.run: wall time, rows and options in
+    and out, plus stage-specific counters (e.g. failed IV roots).
+    """
+
+    def __init__(self):
+        self.stages = []
+
+    def add(self, stage, seconds, rows_in, rows_out, options_in, options_out, **counters):
+        self.stages.append({
+            'stage': stage,
+            'seconds': seconds,
+            'rows_in': rows_in,
+            'rows_out': rows_out,
+            'options_in': options_in,
+            'options_out': options_out,
+            'options_dropped': options_in - options_out,
+            **counters
+        })
+
+    @property
+    def total_seconds(self):
+        return sum(stage['seconds'] for stage in self.stages)
+
+    def to_dict(self):
+        return {'total_seconds': self.total_seconds, 'stages': self.stages}
+
+    def to_frame(self):
+        return pd.DataFrame(self.stages).set_index('stage')
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), default=float)
+
+    def __repr__(self):
+        return self.to_frame().to_string()
+
+
+# convergence counters of implied_vol_vec kept in the report of IV-solving stages
+IV_COUNTERS = ['n_invalid_input', 'n_prefiltered', 'n_no_root', 'n_not_converged', 'mean_iterations']
+
+
+class Pipeline:
+    """
+    Configurable version of process / process_delta_vega.
+
+    lifetime: days before expiration kept (45 for process, 90 for process_delta_vega)
+    outputs: computed columns wanted in the result, any of
+        'IV', 'delta', 'vega', 'gamma', 'theta'
+
+    Stages declare what they need and produce, and only the stages required
+    for outputs are run ('delta' is always computed for the moneyness
+    classification). The input is projected to the columns the stages read
+    plus PASSTHROUGH_COLUMNS, so other raw columns (an index column, a stale
+    initial_moneyness) never reach the result. Options with missing inputs are dropped before the IV
+    solve, so the solver never runs on rows that the NaN filter would drop.
+
+    two_phase: first solve IV/delta only on each option's first date and
+    drop options whose starting delta is unclassifiable (NaN or in the
+    dead zones of classify_moneyness); the full per-row solve then only
+    runs on the survivors. The result is the same either way.
+    """
+
+    GREEKS = ('delta', 'vega', 'gamma', 'theta')
+    # identify the option row in the result without being read by every stage
+    PASSTHROUGH_COLUMNS = ('option_id', 'date', 'expiration_date', 'K')
+
+    def __init__(self, lifetime=90, outputs=('IV', 'delta', 'vega'), two_phase=True,
+                 verbose=True):
+        self.lifetime = lifetime
+        self.outputs = tuple(outputs)
+        self.two_phase = two_phase
+        self.verbose = verbose
+        self.greeks = tuple(g for g in self.GREEKS if g in self.outputs or g == 'delta')
+        self.stages = self._resolve(self._all_stages())
+        self.input_columns = self._input_columns()
+
+    def _all_stages(self):
+        prescreen = [
+            Stage('moneyness_prescreen', self._prescreen_moneyness,
+                  needs=['C', 'S', 'K', 'r', 'TTM'], is_filter=True)
+        ] if self.two_phase else []
+
+        return [
+            Stage('ttm', self._add_ttm, needs=['date', 'expiration_date'],
+                  produces=['TTM']),
+            Stage('validation', self._validate, needs=['option_id', 'date', 'expiration_date'],
+                  is_filter=True),
+            Stage('rates', self._add_rates, needs=['date'], produces=['r']),
+            Stage('input_nan_filter', self._drop_missing_inputs, needs=['TTM'],
+                  is_filter=True),
+            *prescreen,
+            Stage('iv', self._add_iv, needs=['C', 'S', 'K', 'r', 'TTM'], produces=['IV']),
+            Stage('greeks', self._add_greeks, needs=['S', 'K', 'r', 'IV', 'TTM'],
+                  produces=self.greeks),
+            Stage('nan_filter', self._drop_missing_outputs, needs=['TTM'], is_filter=True),
+            Stage('moneyness', self._add_moneyness, needs=['delta'],
+                  produces=['initial_moneyness', 'delta_start']),
+        ]
+
+    def _resolve(self, stages):
+        # walk backwards from the requested outputs and keep what they depend on
+        required = set(self.outputs) | {'initial_moneyness', 'delta_start'}
+        selected = []
+        for stage in reversed(stages):
+            if stage.is_filter or required & set(stage.produces):
+                selected.append(stage)
+                required |= set(stage.needs)
+        return selected[::-1]
+
+    def _input_columns(self):
+        # raw columns read by a stage, minus anything a stage (re)computes
+        needed = set(self.PASSTHROUGH_COLUMNS).union(*(stage.needs for stage in self.stages))
+        produced = set().union(*(stage.produces for stage in self._all_stages()))
+        return needed - produced
+
+    def project(self, data):
+        return data[[col for col in data.columns if col in self.input_columns]]
+
+    def run(self, data, r, all_trading_days=None, return_report=False, log_file=None):
+        """
+        return_report: also return a PipelineReport with per-stage timings
+        and counters. log_file: append the report as one JSON line to this
+        file. Without either no counters are collected.
+        """
+        data = self.project(data)
+        data['date'] = pd.to_datetime(data['date'])
+        data['expiration_date'] = pd.to_datetime(data['expiration_date'])
+
+        # the trading calendar can be passed in when data is only part of the chain
+        if all_trading_days is None:
+            all_trading_days = pd.Index(sorted(data['date'].unique()))
+
+        report = PipelineReport() if return_report or log_file else None
+        context = {'r': as_rate_curve(r), 'all_trading_days': all_trading_days,
+                   'computed': [], 'report': report}
+
+        for stage in self.stages:
+            if report is None:
+                data = stage.func(data, context)
+            else:
+                rows_in, options_in = len(data), data['option_id'].nunique()
+                start = time.perf_counter()
+                data = stage.func(data, context)
+                report.add(stage.name, time.perf_counter() - start, rows_in, len(data),
+                           options_in, data['option_id'].nunique(),
+                           **context.pop('counters', {}))
+            context['computed'].extend(stage.produces)
+
+        if self.verbose:
+            print('Options left:', data['option_id'].nunique())
+
+        if log_file:
+            with open(log_file, 'a') as f:
+                f.write(report.to_json() + '\n')
+        return (data, report) if return_report else data
+
+    def _solve_iv(self, data, context):
+        S, K, rate, ttm = (data[col].to_numpy() for col in ['S', 'K', 'r', 'TTM'])
+        if context['report'] is None:
+            return implied_vol_vec(C=data['C'].to_numpy(), S=S, K=K, r=rate, ttm=ttm)
+
+        iv, iv_report = implied_vol_vec(C=data['C'].to_numpy(), S=S, K=K, r=rate, ttm=ttm,
+                                        return_report=True)
+        context['counters'] = {'n_failed': int(np.isnan(iv).sum()),
+                               **{name: iv_report[name] for name in IV_COUNTERS}}
+        return iv
+
+    def _add_ttm(self, data, context):
+        # add TTM and restrict to the lifetime window
+        data = data[(data['expiration_date'] - data['date']).dt.days <= self.lifetime]
+        data['TTM'] = (data['expiration_date'] - data['date']).dt.days / 365.0
+        return data
+
+    def _validate(self, data, context):
+        validation = validate_option_histories(data, context['all_trading_days'])
+        valid_ids = validation.loc[validation['is_valid'], 'option_id']
+        return data[data['option_id'].isin(valid_ids)]
+
+    def _add_rates(self, data, context):
+        return data.assign(r=context['r'].lookup(data['date']))
+
+    def _drop_options_with_nans(self, data, columns):
+        # eliminate options with any NaNs beside the last day
+        mask_relevant = data['TTM'] != 0
+        nan_rows = data.loc[mask_relevant, columns].isna().any(axis=1)
+        invalid_ids = data.loc[mask_relevant, 'option_id'][nan_rows].unique()
+        return data[~data['option_id'].isin(invalid_ids)]
+
+    def _drop_missing_inputs(self, data, context):
+        return self._drop_options_with_nans(data, list(data.columns))
+
+    def _drop_missing_outputs(self, data, context):
+        return self._drop_options_with_nans(data, context['computed'])
+
+    def _prescreen_moneyness(self, data, context):
+        # phase one: solve only the first row of every option
+        first_rows = data.sort_values('date').groupby('option_id', observed=True).head(1)
+        S, K, rate, ttm = (first_rows[col].to_numpy() for col in ['S', 'K', 'r', 'TTM'])
+        iv = self._solve_iv(first_rows, context)
+        delta_start = bs_greeks(S, K, rate, iv, ttm, which=('delta',))['delta']
+
+        # a NaN starting delta is dropped later as well: by the NaN filter if
+        # TTM != 0, otherwise it is the option's only row and cannot be classified
+        classified = pd.Series(delta_start).apply(classify_moneyness).notna().to_numpy()
+        keep_ids = first_rows['option_id'].to_numpy()[classified]
+        return data[data['option_id'].isin(keep_ids)]
+
+    def _add_iv(self, data, context):
+        data['IV'] = self._solve_iv(data, context)
+        return data
+
+    def _add_greeks(self, data, context):
+        S, K, rate, ttm = (data[col].to_numpy() for col in ['S', 'K', 'r', 'TTM'])
+        greeks = bs_greeks(S, K, rate, data['IV'].to_numpy(), ttm, which=self.greeks)
+        for name in self.greeks:
+            data[name] = greeks[name]
+        return data
+
+    def _add_moneyness(self, data, context):
+        first_rows = (
+            data.sort_values('date')
+            .groupby('option_id', observed=True)['delta']
+            .first()
+            .reset_index()
+        )
+        first_rows['delta_start'] = first_rows['delta']
+        first_rows['initial_moneyness'] = first_rows['delta'].apply(classify_moneyness)
+        first_rows = first_rows.dropna(subset=['initial_moneyness'])
+
+        moneyness_info = first_rows[['option_id', 'initial_moneyness', 'delta_start']]
+        return data.merge(moneyness_info, on='option_id', how='inner')
 
-    validation = (
-        data
-        .groupby('option_id')
-        .apply(lambda opt: validate_option_history(opt, all_trading_days))
-        .reset_index(name='is_valid')
-    )
 
+# processing for TSLA dataset structure
+def process(data, r, all_trading_days=None, return_report=False, log_file=None):
+    return Pipeline(lifetime=45, outputs=('IV', 'delta')).run(
+        data, r, all_trading_days, return_report, log_file)
+
+def process_delta_vega(data, r, all_trading_days=None, return_report=False, log_file=None):
+    return Pipeline(lifetime=90, outputs=('IV', 'delta', 'vega')).run(
+        data, r, all_trading_days, return_report, log_file)
+
+def process_delta_vega_incremental(processed, new_data, r, all_trading_days, lifetime=90):
+    """
+    Appends newly arrived raw rows to a panel produced by process_delta_vega.
+
+    Greeks are only computed for the new rows and only the live options
+    (those with new rows or not yet expired at the first new date) are
+    revalidated; initial_moneyness/delta_start of options already in the
+    panel are carried over from their first rows. Options dropped earlier
+    are not in the panel, so their new rows fail validation as before.
+
+    all_trading_days: trading calendar of the raw data, old and new rows
+    (the processed panel lacks the days on which every option was dropped,
+    so its dates cannot stand in for the calendar).
+    """
+    # a panel read back from CSV has its dates as strings
+    processed = processed.copy()
+    new_data = Pipeline(lifetime=lifetime, verbose=False).project(new_data).copy()
+    for frame in (processed, new_data):
+        frame['date'] = pd.to_datetime(frame['date'])
+        frame['expiration_date'] = pd.to_datetime(frame['expiration_date'])
+    if new_data.empty:
+        return processed
+
+    all_trading_days = pd.Index(sorted(pd.to_datetime(all_trading_days)))
+    unknown_days = ~new_data['date'].isin(all_trading_days)
+    if unknown_days.any():
+        raise ValueError(f'{new_data.loc[unknown_days, "date"].nunique()} dates of new_data '
+                         'are not in all_trading_days')
+
+    # add TTM and restrict to the lifetime window
+    new_data = new_data[(new_data['expiration_date'] - new_data['date']).dt.days <= lifetime]
+    new_data['TTM'] = (new_data['expiration_date'] - new_data['date']).dt.days / 365.0
+
+    # live options: every option that got new rows or should have
+    first_new_date = new_data['date'].min()
+    affected = (processed['option_id'].isin(new_data['option_id'].unique())
+                | (processed['expiration_date'] >= first_new_date))
+    history = pd.concat([processed.loc[affected, ['option_id', 'date', 'expiration_date']],
+                         new_data[['option_id', 'date', 'expiration_date']]])
+
+    validation = validate_option_histories(history, all_trading_days)
     valid_ids = validation.loc[validation['is_valid'], 'option_id']
-    data = data[data['option_id'].isin(valid_ids)]
+    invalid_ids = validation.loc[~validation['is_valid'], 'option_id']
+    new_data = new_data[new_data['option_id'].isin(valid_ids)]
 
     # add interest rate
-    r['date'] = pd.to_datetime(r['date'])
-    r = r[['date', 'r']]
-    data = data.merge(r, on='date', how='left')
-
-    # add IV
-    data['IV'] = data.apply(
-        lambda row: implied_vol(
-            C = row['C'],
-            S = row['S'],
-            K = row['K'],
-            r = row['r'],
-            ttm = row['TTM']
-        ),
-        axis=1
-    )
-
-    # add delta per row
-    data['delta'] = data.apply(
-        lambda row: get_delta(
-            S = row['S'],
-            K = row['K'],
-            r = row['r'],
-            sigma = row['IV'],
-            ttm = row['TTM']
-        ),
-        axis=1
-    )
-
-    # eliminate rows with any NaNs beside the last day
-    mask_relevant = data['TTM'] != 0
-    invalid_options = (
-        data[mask_relevant]
-        .groupby('option_id')
-        .apply(lambda g: g.isna().any(axis=1).any())
+    new_data = new_data.assign(r=as_rate_curve(r).lookup(new_data['date']))
+
+    # add IV, delta and vega for the new rows only
+    S, K, rate, ttm = (new_data[col].to_numpy() for col in ['S', 'K', 'r', 'TTM'])
+    new_data['IV'] = implied_vol_vec(C=new_data['C'].to_numpy(), S=S, K=K, r=rate, ttm=ttm)
+    greeks = bs_greeks(S, K, rate, new_data['IV'].to_numpy(), ttm, which=('delta', 'vega'))
+    new_data['delta'] = greeks['delta']
+    new_data['vega'] = greeks['vega']
+
+    # rows already in the panel passed the NaN filter, so only new rows can fail it
+    mask_relevant = new_data['TTM'] != 0
+    nan_rows = new_data[mask_relevant].isna().any(axis=1)
+    nan_ids = new_data.loc[mask_relevant, 'option_id'][nan_rows].unique()
+    new_data = new_data[~new_data['option_id'].isin(nan_ids)]
+
+    # moneyness: carried over for known options, classified on the first row for new ones
+    known = (
+        processed.sort_values('date')
+        .drop_duplicates('option_id')[['option_id', 'delta_start']]
     )
-    invalid_ids = invalid_options[invalid_options].index
-
-    data = data[~data['option_id'].isin(invalid_ids)]
-
-    first_rows = (
-        data.sort_values('date')
-        .groupby('option_id')
+    known = known[known['option_id'].isin(new_data['option_id'].unique())]
+    first_new = (
+        new_data[~new_data['option_id'].isin(known['option_id'])]
+        .sort_values('date')
+        .groupby('option_id', observed=True)['delta']
         .first()
-        .reset_index()
+        .reset_index(name='delta_start')
     )
-    first_rows['delta_start'] = first_rows['delta']
-    first_rows['initial_moneyness'] = first_rows['delta'].apply(classify_moneyness)
-    first_rows = first_rows.dropna(subset=['initial_moneyness'])
-
-    moneyness_info = first_rows[['option_id', 'initial_moneyness', 'delta_start']]
-
-    data = data.merge(moneyness_info, on='option_id', how='inner')
+    moneyness_info = pd.concat([known, first_new], ignore_index=True)
+    moneyness_info['initial_moneyness'] = moneyness_info['delta_start'].apply(classify_moneyness)
+    moneyness_info = moneyness_info.dropna(subset=['initial_moneyness'])
+    moneyness_info = moneyness_info[['option_id', 'initial_moneyness', 'delta_start']]
 
+    new_data = new_data.merge(moneyness_info, on='option_id', how='inner')
 
+    dropped = set(invalid_ids) | set(nan_ids)
+    data = pd.concat([processed[~processed['option_id'].isin(dropped)], new_data],
+                     ignore_index=True)
 
     print('Options left:', data['option_id'].nunique())
     return data
 
-def process_delta_vega(data, r):
-    data['date'] = pd.to_datetime(data['date'])
-    data['expiration_date'] = pd.to_datetime(data['expiration_date'])
-
-    all_trading_days = pd.Index(sorted(data['date'].unique()))
-
-    # add TTM and restrict to 45 days
-    data = data[(data['expiration_date'] - data['date']).dt.days <= 90]
+def process_delta_vega_streaming(raw_path, r, out_path, chunksize=100_000, tmp_dir=None):
+    """
+    process_delta_vega for raw files too large to hold in memory.
+
+    The raw CSV is read in chunks and spilled to one temporary file per
+    expiration_date (options never cross expirations). Each partition is
+    then processed on its own against the full trading calendar and
+    appended to out_path (CSV), so peak memory is bounded by the largest
+    expiration. An existing out_path is replaced. Returns the number of
+    rows written.
+    """
+    r = as_rate_curve(r)
+    trading_days = set()
+    partitions = {}
+
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as spill_dir:
+        for chunk in pd.read_csv(raw_path, chunksize=chunksize):
+            trading_days.update(pd.to_datetime(chunk['date']).unique())
+            for expiration, part in chunk.groupby('expiration_date', sort=False):
+                if expiration not in partitions:
+                    partitions[expiration] = os.path.join(spill_dir, f'{len(partitions)}.csv')
+                path = partitions[expiration]
+                part.to_csv(path, mode='a', header=not os.path.exists(path), index=False)
+
+        all_trading_days = pd.Index(sorted(trading_days))
+
+        # start from an empty output, so a run where no option survives leaves no stale file
+        if os.path.exists(out_path):
+            os.remove(out_path)
+
+        pipeline = Pipeline(lifetime=90, outputs=('IV', 'delta', 'vega'), verbose=False)
+        rows_written = 0
+        options_left = 0
+        for expiration in sorted(partitions):
+            processed = pipeline.run(load_data(partitions[expiration]), r,
+                                     all_trading_days=all_trading_days)
+            if processed.empty:
+                continue
+            processed.to_csv(out_path, mode='w' if rows_written == 0 else 'a',
+                             header=rows_written == 0, index=False)
+            rows_written += len(processed)
+            options_left += processed['option_id'].nunique()
+
+    print('Options left:', options_left)
+    return rows_written
+
+def process_cached(raw_path, rate_path, delta_vega=True, rate_tolerance_days=7,
+                   cache_dir=cache.CACHE_DIR, max_bytes=cache.MAX_CACHE_BYTES):
+    """
+    process / process_delta_vega behind an on-disk cache keyed on the content
+    of the raw and rate files, the rate gap tolerance, the lifetime window and
+    the IV solver settings. Returns the cached panel on a hit and rebuilds
+    (and stores) it on a miss.
+    """
+    solver_defaults = {
+        name: param.default
+        for name, param in inspect.signature(implied_vol_vec).parameters.items()
+        if param.default is not inspect.Parameter.empty and name != 'return_report'
+    }
+    settings = {
+        'stage': 'process_delta_vega' if delta_vega else 'process',
+        'lifetime': 90 if delta_vega else 45,
+        'rate_tolerance_days': rate_tolerance_days,
+        'solver': 'implied_vol_vec',
+        'solver_settings': solver_defaults
+    }
+    key = cache.cache_key([raw_path, rate_path], settings)
+
+    cached = cache.load_cached(key, cache_dir)
+    if cached is not None:
+        return cached
+
+    data = load_data(raw_path)
+    rates = RateCurve.from_csv(rate_path, tolerance=pd.Timedelta(days=rate_tolerance_days))
+    processed = process_delta_vega(data, rates) if delta_vega else process(data, rates)
+
+    cache.store(key, processed, {'input_paths': [raw_path, rate_path], 'settings': settings},
+                cache_dir, max_bytes)
+    return processed
 
-    data['TTM'] = (data['expiration_date'] - data['date']).dt.days / 365.0
-
-    
-
-    validation = (
-        data
-        .groupby('option_id')
-        .apply(lambda opt: validate_option_history(opt, all_trading_days))
-        .reset_index(name='is_valid')
-    )
-
-    valid_ids = validation.loc[validation['is_valid'], 'option_id']
-    data = data[data['option_id'].isin(valid_ids)]
-
-    # add interest rate
-    r['date'] = pd.to_datetime(r['date'])
-    r = r[['date', 'r']]
-    data = data.merge(r, on='date', how='left')
-
-    # add IV
-    data['IV'] = data.apply(
-        lambda row: implied_vol(
-            C = row['C'],
-            S = row['S'],
-            K = row['K'],
-            r = row['r'],
-            ttm = row['TTM']
-        ),
-        axis=1
-    )
-
-    # add delta per row
-    data['delta'] = data.apply(
-        lambda row: get_delta(
-            S = row['S'],
-            K = row['K'],
-            r = row['r'],
-            sigma = row['IV'],
-            ttm = row['TTM']
-        ),
-        axis=1
-    )
-
-    # add vega per row
-    data['vega'] = data.apply(
-        lambda row: get_vega(
-            S = row['S'],
-            K = row['K'],
-            r = row['r'],
-            sigma = row['IV'],
-            ttm = row['TTM']
-        ),
-        axis=1
-    )
-
-    # eliminate options with any NaNs beside the last day
-    mask_relevant = data['TTM'] != 0
-    invalid_options = (
-        data[mask_relevant]
-        .groupby('option_id')
-        .apply(lambda g: g.isna().any(axis=1).any())
-    )
-    invalid_ids = invalid_options[invalid_options].index
-
-    data = data[~data['option_id'].isin(invalid_ids)]
-
-    first_rows = (
-        data.sort_values('date')
-        .groupby('option_id')
-        .first()
-        .reset_index()
-    )
-    first_rows['delta_start'] = first_rows['delta']
-    first_rows['initial_moneyness'] = first_rows['delta'].apply(classify_moneyness)
-    first_rows = first_rows.dropna(subset=['initial_moneyness'])
-
-    moneyness_info = first_rows[['option_id', 'initial_moneyness', 'delta_start']]
-
-    data = data.merge(moneyness_info, on='option_id', how='inner')
-
-
-
-    print('Options left:', data['option_id'].nunique())
-    return data
 
 if __name__ == "__main__":
     ticker = 'AAPL'
-    rates = load_data("data/raw/interest_rate.csv")
-    data = load_data(f"data/raw/{ticker}.csv")
-    processed = process_delta_vega(data, rates)
-    summary = data.groupby('expiration_date')['K'].unique().sort_index()
+    raw_path = os.path.join(RAW_DIR, f"{ticker}.csv")
+    # forward-fill rate gaps (holidays, blank prints) of up to a week
+    processed = process_cached(raw_path, os.path.join(RAW_DIR, RATE_FILE), rate_tolerance_days=7)
+    summary = load_data(raw_path).groupby('expiration_date')['K'].unique().sort_index()
     print('Unique expiration dates:', processed['expiration_date'].nunique())
     print(summary)
-    processed.to_csv(f"data/processed/{ticker}_processed_vega.csv", index=False)
\ No newline at end of file
+    save_data(processed, os.path.join(PROCESSED_DIR, f"{ticker}_processed_vega.csv"))
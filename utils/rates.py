@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+
+class RateCurve:
+    """
+    Risk-free rate by date, built once from interest_rate.csv and shared
+    across tickers.
+
+    lookup() is an as-of search on the sorted rate dates: a date gets the
+    last published rate on or before it, provided that print is at most
+    tolerance old. The default tolerance of zero reproduces the exact-date
+    merge; a few days of tolerance forward-fills holidays and blank prints.
+    """
+
+    def __init__(self, rates: pd.DataFrame, tolerance=pd.Timedelta(0)):
+        rates = rates[['date', 'r']].dropna(subset=['r'])
+        rates = rates.assign(date=pd.to_datetime(rates['date'])).sort_values('date')
+        rates = rates.drop_duplicates('date', keep='last')
+
+        self.dates = rates['date'].to_numpy(dtype='datetime64[ns]')
+        self.values = rates['r'].to_numpy(dtype=float)
+        self.tolerance = np.timedelta64(pd.Timedelta(tolerance).value, 'ns')
+
+    @classmethod
+    def from_csv(cls, file_path: str, tolerance=pd.Timedelta(0)) -> 'RateCurve':
+        return cls(pd.read_csv(file_path), tolerance=tolerance)
+
+    def lookup(self, dates) -> np.ndarray:
+        dates = pd.to_datetime(np.asarray(dates)).to_numpy(dtype='datetime64[ns]')
+        if not len(self.dates):
+            return np.full(dates.shape, np.nan)
+
+        idx = np.searchsorted(self.dates, dates, side='right') - 1
+        found = idx >= 0
+        idx = np.maximum(idx, 0)
+        found &= (dates - self.dates[idx]) <= self.tolerance
+
+        return np.where(found, self.values[idx], np.nan)
+
+
+def as_rate_curve(r) -> RateCurve:
+    # process functions accept either the raw rate frame or a prebuilt curve
+    return r if isinstance(r, RateCurve) else RateCurve(r)
@@ -0,0 +1,163 @@
+import numpy as np
+import pandas as pd
+
+# expiration month codes by month (index 0 = January)
+EXP_CODES = np.array(list('ABCDEFGHIJKL'))
+CALL_CODES = EXP_CODES
+PUT_CODES = np.array(list('MNOPQRSTUVWX'))
+
+# month -> codes, in the shape query_window expects ('exp' is the expired-RIC suffix)
+IDENT = {str(m + 1): {'exp': EXP_CODES[m], 'C': CALL_CODES[m], 'P': PUT_CODES[m]}
+         for m in range(12)}
+
+# option root codes of indexes whose root differs from the index RIC
+INDEX_ROOTS = {'OSA': {'N225': 'JNI', 'TOPX': 'JTI'},
+               'EUX': {'FTSE': 'OTUK', 'SSMI': 'OSMI', 'GDAXI': 'GDAX', 'ATX': 'FATXA', 'STOXX50E': 'STXE'},
+               'IEU': {'FTSE': 'LFE'}}
+
+# candidate generations (price adjustments after corporate events), tried in order
+HK_GENERATIONS = ['0', '1', '2', '3']
+OSE_GENERATIONS = ['Y', 'Z', 'A', 'B', 'C']
+OSE_JNET = ['', 'L', 'R']
+EU_GENERATIONS = ['', 'a', 'b', 'c', 'd']
+
+# OPRA strikes from 10000 on: leading letter for the ten-thousands
+OPRA_BIG_STRIKE_CODES = np.array(['', 'A', 'B', 'C', 'D'])
+
+
+def asset_root(asset, exchange=None):
+    # index RICs start with "."; equities only need the part before the exchange suffix
+    if asset[0] == '.':
+        return INDEX_ROOTS.get(exchange, {}).get(asset[1:], asset[1:])
+    return asset.split('.')[0]
+
+
+def _broadcast(maturities, strikes, opt_types):
+    """
+    Broadcasts the inputs to n rows and returns the month index (0 = January),
+    day and 4-digit year strings, strike in cents and a put flag per row.
+    The strike is rounded to cents, so 152.5, 152.50, np.float64(152.5) and
+    152.3 (152.29999... * 100) all encode the same way.
+    """
+    maturities, strikes, opt_types = np.broadcast_arrays(
+        np.atleast_1d(np.asarray(maturities, dtype=object)),
+        np.atleast_1d(np.asarray(strikes, dtype=float)),
+        np.atleast_1d(np.char.upper(np.asarray(opt_types, dtype=str))))
+
+    if not np.isin(opt_types, ['C', 'P']).all():
+        raise ValueError(f'opt_type must be "C" or "P", got {sorted(set(opt_types) - {"C", "P"})}')
+
+    exp_dates = pd.DatetimeIndex(pd.to_datetime(maturities))
+    cents = np.rint(strikes * 100).astype(np.int64)
+    return (exp_dates.month.to_numpy() - 1,
+            exp_dates.day.astype(str).to_numpy(dtype=object),
+            exp_dates.year.astype(str).to_numpy(dtype=object),
+            cents,
+            opt_types == 'P')
+
+
+def _month_codes(months, is_put):
+    return np.where(is_put, PUT_CODES[months], CALL_CODES[months]).astype(object)
+
+
+def _last(strings, k):
+    return np.array([s[-k:] for s in strings], dtype=object)
+
+
+def _zfill(values, width):
+    return pd.Series(values).astype(str).str.zfill(width).to_numpy(dtype=object)
+
+
+def _combine(parts, candidates):
+    """
+    One column per candidate: parts is a list of per-row arrays or scalars
+    with a single None where the candidate code goes.
+    """
+    columns = []
+    for candidate in candidates:
+        ric = ''
+        for part in parts:
+            ric = ric + (candidate if part is None else part)
+        columns.append(ric)
+    return np.column_stack(columns) if len(columns) else np.empty((0, 0), dtype=object)
+
+
+def rics_opra(asset, maturities, strikes, opt_types):
+    months, day, year, cents, is_put = _broadcast(maturities, strikes, opt_types)
+    int_part = cents // 100
+    if (int_part >= 50000).any():
+        raise ValueError('OPRA strike codes only go up to 49999')
+
+    # strikes above 999.999 use lower-case month codes
+    month_code = _month_codes(months, is_put)
+    month_code = np.where(cents > 99999, np.char.lower(month_code.astype(str)), month_code).astype(object)
+
+    # below 1000: 3 integer digits + 2 decimals; 1000-9999: 4 digits + '0';
+    # from 10000: letter for the ten-thousands + last 4 digits
+    strike_ric = np.where(int_part < 1000, _zfill(cents, 5),
+                          np.where(int_part < 10000, _zfill(int_part, 4) + '0',
+                                   OPRA_BIG_STRIKE_CODES[np.minimum(int_part // 10000, 4)].astype(object)
+                                   + _zfill(int_part % 10000, 4)))
+
+    return _combine([asset_root(asset) + month_code + day + _last(year, 2) + strike_ric + '.U'], [''])
+
+
+def rics_hk(asset, maturities, strikes, opt_types):
+    months, _, year, cents, is_put = _broadcast(maturities, strikes, opt_types)
+    tail = _month_codes(months, is_put) + _last(year, 1)
+
+    # index options quote the strike in points, equity options in cents
+    if asset[0] == '.':
+        return _combine([asset_root(asset) + (cents // 100).astype(str).astype(object) + tail + '.HF'], [''])
+    return _combine([asset_root(asset) + cents.astype(str).astype(object), None, tail + '.HK'], HK_GENERATIONS)
+
+
+def rics_ose(asset, maturities, strikes, opt_types):
+    months, _, year, cents, is_put = _broadcast(maturities, strikes, opt_types)
+    # leading three digits of the strike
+    strike_ric = pd.Series(cents // 100).astype(str).str[:3].to_numpy(dtype=object)
+    tail = strike_ric + _month_codes(months, is_put) + _last(year, 1) + '.OS'
+
+    root = asset_root(asset, 'OSA')
+    if asset[0] == '.':
+        # J-NET (off-auction, "L") and high-frequency ("R") structures
+        return _combine([root, None, tail], OSE_JNET)
+    return _combine([root, None, tail], [jnet + gen for jnet in OSE_JNET for gen in OSE_GENERATIONS])
+
+
+def _strike_tenths(cents):
+    # integer part (at least 2 digits) followed by the first decimal
+    return _zfill(cents // 100, 2) + ((cents // 10) % 10).astype(str).astype(object)
+
+
+def rics_eurex(asset, maturities, strikes, opt_types):
+    months, _, year, cents, is_put = _broadcast(maturities, strikes, opt_types)
+    tail = _month_codes(months, is_put) + _last(year, 1) + '.EX'
+    return _combine([asset_root(asset, 'EUX') + _strike_tenths(cents), None, tail], EU_GENERATIONS)
+
+
+def rics_ieu(asset, maturities, strikes, opt_types):
+    months, _, year, cents, is_put = _broadcast(maturities, strikes, opt_types)
+    # integer strike padded to 3 digits; single-digit strikes carry their first decimal
+    strike_ric = np.where(cents < 1000, _strike_tenths(cents), _zfill(cents // 100, 3))
+    tail = _month_codes(months, is_put) + _last(year, 1) + '.L'
+    return _combine([asset_root(asset, 'IEU') + strike_ric, None, tail], EU_GENERATIONS)
+
+
+# candidate RIC builders by exchange code
+EXCHANGE_RICS = {'OPQ': rics_opra,
+                 'IEU': rics_ieu,
+                 'EUX': rics_eurex,
+                 'HKG': rics_hk,
+                 'HFE': rics_hk,
+                 'OSA': rics_ose}
+
+
+def candidate_rics(exchange, asset, maturities, strikes, opt_types):
+    """
+    Candidate option RICs for arrays of (maturity, strike, opt_type) on one
+    underlying. Scalars broadcast against the arrays. Returns an object array
+    of shape (n, n_candidates); candidates are in the order they should be
+    tried (the first one with prices wins).
+    """
+    return EXCHANGE_RICS[exchange](asset, maturities, strikes, opt_types)
@@ -1,3 +1,4 @@
+import time
 import numpy as np
 import pandas as pd
 from scipy.stats import norm
@@ -20,6 +21,42 @@ def get_delta(S, K, r, sigma, ttm):
     delta = norm.cdf(d1)
     return delta
 
+def bs_greeks(S, K, r, sigma, ttm, which=('price', 'delta', 'vega')):
+    """
+    Batched Black-Scholes call price and Greeks over NumPy arrays.
+
+    d1/d2 are computed once and shared by every requested output.
+    which: any of 'price', 'delta', 'vega', 'gamma', 'theta'
+    Returns a dict of arrays keyed by the names in which.
+    """
+    S, K, r, sigma, ttm = (np.asarray(x, dtype=float) for x in (S, K, r, sigma, ttm))
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        sqrt_ttm = np.sqrt(ttm)
+        sig_sqrt_ttm = sigma * sqrt_ttm
+        d1 = (np.log(S / K) + (r + 0.5 * sigma ** 2) * ttm) / sig_sqrt_ttm
+        d2 = d1 - sig_sqrt_ttm
+        pdf_d1 = norm.pdf(d1)
+        cdf_d1 = norm.cdf(d1)
+        discount_K = K * np.exp(-r * ttm)
+
+        out = {}
+        for name in which:
+            if name == 'price':
+                out[name] = S * cdf_d1 - discount_K * norm.cdf(d2)
+            elif name == 'delta':
+                out[name] = cdf_d1
+            elif name == 'vega':
+                out[name] = S * pdf_d1 * sqrt_ttm
+            elif name == 'gamma':
+                out[name] = pdf_d1 / (S * sig_sqrt_ttm)
+            elif name == 'theta':
+                out[name] = (-S * pdf_d1 * sigma / (2 * sqrt_ttm)
+                             - r * discount_K * norm.cdf(d2))
+            else:
+                raise ValueError(f"Unknown greek '{name}'")
+    return out
+
 def implied_vol_old(C, S, K, r, ttm, max_iterations=100):
     if ttm <= 0 or S <= 0 or K <=0 or C <= 0:
         return np.nan
@@ -42,21 +79,234 @@ def implied_vol_old(C, S, K, r, ttm, max_iterations=100):
 
     return np.nan
 
-def implied_vol(C, S, K, r, ttm):
-    # basic sanity checks
-    if ttm <= 0 or S <= 0 or K <= 0 or C <= 0:
-        return np.nan
+# implied-vol solver status codes (full_output / return_report modes)
+IV_OK = 0
+IV_INVALID_INPUT = 1     # non-positive or missing C, S, K or TTM
+IV_BELOW_INTRINSIC = 2   # C below the no-arbitrage lower bound max(S - K e^{-rT}, 0)
+IV_ABOVE_SPOT = 3        # C at or above S, the upper bound
+IV_BRACKET_MISS = 4      # within the bounds, but no root in [lower, upper]
+IV_MAX_ITER = 5          # root bracketed, solver did not converge
+IV_STATUS_NAMES = {IV_OK: 'ok',
+                   IV_INVALID_INPUT: 'invalid_input',
+                   IV_BELOW_INTRINSIC: 'below_intrinsic',
+                   IV_ABOVE_SPOT: 'above_spot',
+                   IV_BRACKET_MISS: 'bracket_miss',
+                   IV_MAX_ITER: 'max_iter'}
+
+
+def _no_root_status(C, S, K, r, ttm, below_bracket):
+    # why the bracket has no sign change: price under the bracket's low end or over its high end
+    intrinsic = np.maximum(S - K * np.exp(-r * ttm), 0.0)
+    return np.where(below_bracket,
+                    np.where(C < intrinsic, IV_BELOW_INTRINSIC, IV_BRACKET_MISS),
+                    np.where(C >= S, IV_ABOVE_SPOT, IV_BRACKET_MISS))
+
+
+def iv_bounds_status(C, S, K, r, ttm, rtol=1e-10):
+    """
+    Vectorized no-arbitrage check, run before solving. Returns IV_OK for
+    rows worth solving, IV_INVALID_INPUT for non-positive or missing inputs,
+    IV_BELOW_INTRINSIC for C < max(S - K e^{-rT}, 0) and IV_ABOVE_SPOT for
+    C > S. A Black-Scholes call price never leaves these bounds, so flagged
+    rows have no root; rows within rtol of a bound are left to the solver,
+    which keeps the results identical to solving every row.
+    """
+    C, S, K, r, ttm = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (C, S, K, r, ttm)))
+    with np.errstate(invalid='ignore', over='ignore'):
+        valid = ((ttm > 0) & (S > 0) & (K > 0) & (C > 0)
+                 & np.isfinite(C) & np.isfinite(S) & np.isfinite(K)
+                 & np.isfinite(r) & np.isfinite(ttm))
+        intrinsic = np.maximum(S - K * np.exp(-r * ttm), 0.0)
+        return np.where(~valid, IV_INVALID_INPUT,
+                        np.where(C < intrinsic - rtol * S, IV_BELOW_INTRINSIC,
+                                 np.where(C > S * (1 + rtol), IV_ABOVE_SPOT, IV_OK)))
+
+
+def implied_vol(C, S, K, r, ttm, lower=1e-8, upper=10.0, xtol=1e-4, maxiter=1000,
+                full_output=False):
+    """
+    full_output: return (iv, status, iterations) instead of iv, with status
+    one of the IV_* codes and iterations the number of brentq iterations.
+    """
+    # basic sanity checks and no-arbitrage bounds: no root, skip the solve
+    status = int(iv_bounds_status(C, S, K, r, ttm))
+    if status != IV_OK:
+        return (np.nan, status, 0) if full_output else np.nan
 
     # lower and upper bounds for sigma
     def f(sigma):
         return bs_price(S, K, r, sigma, ttm) - C
 
+    if full_output:
+        f_lo, f_hi = f(lower), f(upper)
+        if f_lo * f_hi > 0:
+            return np.nan, int(_no_root_status(C, S, K, r, ttm, f_lo > 0)), 0
+        sigma, result = brentq(f, lower, upper, maxiter=maxiter, xtol=xtol,
+                               full_output=True, disp=False)
+        if not result.converged:
+            return np.nan, IV_MAX_ITER, result.iterations
+        return sigma, IV_OK, result.iterations
+
     try:
         # solve f(sigma) = 0
-        return brentq(f, 1e-8, 10, maxiter=1000, xtol=1e-4)
+        return brentq(f, lower, upper, maxiter=maxiter, xtol=xtol)
     except ValueError:
-        # no root in [1e-6, 5]
+        # no root in [lower, upper]
         return np.nan
     except RuntimeError:
         # numerical issues
-        return np.nan
\ No newline at end of file
+        return np.nan
+
+
+def implied_vol_diagnostics(C, S, K, r, ttm, lower=1e-8, upper=10.0, xtol=1e-4, maxiter=1000):
+    """
+    Runs implied_vol row by row in full_output mode and times every row.
+
+    Returns a DataFrame with IV, status (IV_* code), status_name, iterations
+    and seconds per row, and a summary dict (see iv_status_summary) for
+    tuning the bracket and xtol and spotting the rows that cost the most.
+    """
+    C, S, K, r, ttm = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (C, S, K, r, ttm)))
+    n = C.size
+    iv = np.full(n, np.nan)
+    status = np.zeros(n, dtype=int)
+    iterations = np.zeros(n, dtype=int)
+    seconds = np.zeros(n)
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        for i, row in enumerate(zip(C.ravel(), S.ravel(), K.ravel(), r.ravel(), ttm.ravel())):
+            start = time.perf_counter()
+            iv[i], status[i], iterations[i] = implied_vol(*row, lower=lower, upper=upper, xtol=xtol,
+                                                          maxiter=maxiter, full_output=True)
+            seconds[i] = time.perf_counter() - start
+
+    rows = pd.DataFrame({'IV': iv, 'status': status,
+                         'status_name': pd.Series(status).map(IV_STATUS_NAMES),
+                         'iterations': iterations, 'seconds': seconds})
+    return rows, iv_status_summary(status, iterations, seconds)
+
+
+def iv_status_summary(status, iterations, seconds=None, n_slowest=10):
+    """
+    Aggregates per-row solver output: row count per status, a histogram of
+    iterations (index = iteration count) and, with per-row seconds, the time
+    per status and the positions of the n_slowest rows.
+    """
+    status = np.asarray(status)
+    iterations = np.asarray(iterations)
+    summary = {
+        'n_rows': int(status.size),
+        'status_counts': {name: int((status == code).sum()) for code, name in IV_STATUS_NAMES.items()},
+        'iteration_histogram': np.bincount(iterations.ravel(), minlength=1).tolist(),
+        'mean_iterations': float(iterations[status == IV_OK].mean()) if (status == IV_OK).any() else 0.0,
+    }
+    if seconds is not None:
+        seconds = np.asarray(seconds)
+        summary['total_seconds'] = float(seconds.sum())
+        summary['seconds_by_status'] = {name: float(seconds[status == code].sum())
+                                        for code, name in IV_STATUS_NAMES.items()}
+        summary['slowest_rows'] = np.argsort(seconds.ravel())[::-1][:n_slowest].tolist()
+    return summary
+
+
+def _iv_initial_guess(C, S, K, r, ttm):
+    # Corrado-Miller approximation, falls back to 0.2 where it is undefined
+    X = K * np.exp(-r * ttm)
+    half_gap = C - 0.5 * (S - X)
+    radicand = np.maximum(half_gap ** 2 - (S - X) ** 2 / np.pi, 0.0)
+    sigma = np.sqrt(2 * np.pi / ttm) / (S + X) * (half_gap + np.sqrt(radicand))
+    return np.where(np.isfinite(sigma) & (sigma > 0), sigma, 0.2)
+
+def implied_vol_vec(C, S, K, r, ttm, lower=1e-8, upper=10.0, xtol=1e-10,
+                    max_iterations=100, return_report=False):
+    """
+    Array version of implied_vol: inverts Black-Scholes for whole columns at once.
+
+    Uses a Newton step inside the bracket [lower, upper] and falls back to
+    bisection whenever Newton would leave it. Returns NaN for the same rows
+    as implied_vol (non-positive TTM, S, K or C, missing inputs, no root in
+    the bracket). With return_report=True also returns a convergence report
+    with per-row IV_* status codes and iteration counts.
+    """
+    C, S, K, r, ttm = np.broadcast_arrays(*(np.asarray(x, dtype=float)
+                                            for x in (C, S, K, r, ttm)))
+    iv = np.full(C.shape, np.nan)
+    iterations = np.zeros(C.shape, dtype=int)
+
+    # rows outside the no-arbitrage bounds never reach the solver
+    bounds = iv_bounds_status(C, S, K, r, ttm)
+    idx = np.flatnonzero(bounds == IV_OK)
+    c, s, k, rr, t = (x.ravel()[idx] for x in (C, S, K, r, ttm))
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        lo = np.full(idx.size, lower)
+        hi = np.full(idx.size, upper)
+        f_lo = bs_price(s, k, rr, lo, t) - c
+        f_hi = bs_price(s, k, rr, hi, t) - c
+
+        # same rule as brentq: no sign change means no root in the bracket
+        has_root = ~(f_lo * f_hi > 0)
+        sigma = np.clip(_iv_initial_guess(c, s, k, rr, t), lower, upper)
+        sigma = np.where(f_lo == 0, lower, np.where(f_hi == 0, upper, sigma))
+
+        active = has_root & (f_lo != 0) & (f_hi != 0)
+        converged = has_root & ~active
+        n_iter = np.zeros(idx.size, dtype=int)
+
+        for _ in range(max_iterations):
+            if not active.any():
+                break
+            a = np.flatnonzero(active)
+            sig = sigma[a]
+            greeks = bs_greeks(s[a], k[a], rr[a], sig, t[a], which=('price', 'vega'))
+            diff = greeks['price'] - c[a]
+            vega = greeks['vega']
+
+            # the call price is increasing in sigma, so the sign of diff
+            # tells which side of the root we are on
+            above = diff > 0
+            hi[a] = np.where(above, sig, hi[a])
+            lo[a] = np.where(above, lo[a], sig)
+
+            newton = sig - diff / vega
+            bisect = 0.5 * (lo[a] + hi[a])
+            inside = np.isfinite(newton) & (newton > lo[a]) & (newton < hi[a])
+            new_sigma = np.where(inside, newton, bisect)
+
+            n_iter[a] += 1
+            done = (diff == 0) | (np.abs(new_sigma - sig) < xtol) | (hi[a] - lo[a] < xtol)
+            sigma[a] = np.where(diff == 0, sig, new_sigma)
+            converged[a[done]] = True
+            active[a[done]] = False
+
+    iv.ravel()[idx[converged]] = sigma[converged]
+    iterations.ravel()[idx] = n_iter
+
+    if not return_report:
+        return iv
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        price_error = np.abs(bs_price(s[converged], k[converged], rr[converged],
+                                      sigma[converged], t[converged]) - c[converged])
+    status = bounds.ravel().copy()
+    solved_status = np.where(converged, IV_OK, IV_MAX_ITER)
+    no_root = np.flatnonzero(~has_root)
+    solved_status[no_root] = _no_root_status(c[no_root], s[no_root], k[no_root], rr[no_root],
+                                             t[no_root], f_lo[no_root] > 0)
+    status[idx] = solved_status
+    status = status.reshape(C.shape)
+
+    report = {
+        **iv_status_summary(status, iterations),
+        'status': status,
+        'n_rows': int(C.size),
+        'n_invalid_input': int((bounds == IV_INVALID_INPUT).sum()),
+        'n_prefiltered': int(C.size - idx.size - (bounds == IV_INVALID_INPUT).sum()),
+        'n_no_root': int(C.size - idx.size - (bounds == IV_INVALID_INPUT).sum() + (~has_root).sum()),
+        'n_converged': int(converged.sum()),
+        'n_not_converged': int((has_root & ~converged).sum()),
+        'iterations': iterations,
+        'max_iterations': int(n_iter.max()) if n_iter.size else 0,
+        'max_abs_price_error': float(price_error.max()) if price_error.size else 0.0,
+    }
+    return iv, report